@@ -0,0 +1,98 @@
+"""
+Incremental maintenance of the materialized Balance table.
+
+Every Ledger row moves money within one (household, user pair) bucket:
+a regular entry means `from_user` owes `to_user` more, a settlement means
+`from_user` paid some of that back. Callers that insert Ledger rows must
+call `apply_ledger_entries` inside the same DB transaction; single-row
+saves and deletes are covered by the receivers in finance.signals.
+Ledger rows are treated as append-only: editing an existing row's amount
+is not reflected until `manage.py rebuild_balances` is run.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import Balance, Ledger
+
+EXTERNAL_HOUSEHOLD = 'external'
+
+
+def household_for(from_household_id, to_household_id):
+    """
+    Fallback household for Ledger rows without one. Placeholder users live
+    in the 'external' household, so prefer the real user's one.
+    """
+    if from_household_id != EXTERNAL_HOUSEHOLD:
+        return from_household_id
+    return to_household_id
+
+
+def pair_key(from_user_id, to_user_id):
+    """
+    Returns (user_a_id, user_b_id, sign) for a debt from `from_user_id` to
+    `to_user_id`, where sign converts the debt into user_a's perspective.
+    """
+    if str(from_user_id) < str(to_user_id):
+        return from_user_id, to_user_id, 1
+    return to_user_id, from_user_id, -1
+
+
+def _signed_amount(entry):
+    return -entry.amount if entry.is_settlement else entry.amount
+
+
+def apply_ledger_entries(entries, sign=1):
+    """
+    Folds Ledger rows into the Balance table, one UPDATE (or INSERT) per
+    distinct pair. Pass sign=-1 to reverse entries that are being deleted.
+    """
+    deltas = defaultdict(Decimal)
+    for entry in entries:
+        user_a_id, user_b_id, direction = pair_key(entry.from_user_id, entry.to_user_id)
+        household_id = entry.household_id or household_for(entry.from_user.household_id, entry.to_user.household_id)
+        deltas[(household_id, user_a_id, user_b_id)] += sign * direction * _signed_amount(entry)
+
+    with transaction.atomic():
+        for (household_id, user_a_id, user_b_id), delta in deltas.items():
+            if delta:
+                _add_to_balance(household_id, user_a_id, user_b_id, delta)
+
+
+def _add_to_balance(household_id, user_a_id, user_b_id, delta):
+    lookup = {'household_id': household_id, 'user_a_id': user_a_id, 'user_b_id': user_b_id}
+    if Balance.objects.filter(**lookup).update(amount=F('amount') + delta):
+        return
+    try:
+        with transaction.atomic():
+            Balance.objects.create(amount=delta, **lookup)
+    except IntegrityError:
+        # Another writer created the row first; add on top of theirs.
+        Balance.objects.filter(**lookup).update(amount=F('amount') + delta)
+
+
+def compute_balances_from_ledger():
+    """
+    Aggregates the raw Ledger table into {(household_id, user_a_id, user_b_id): amount}.
+    This is the slow path the materialized table replaces; it is used to
+    rebuild and verify Balance.
+    """
+    rows = (
+        Ledger.objects
+        .values(
+            'from_user_id', 'to_user_id', 'is_settlement', 'household_id',
+            'from_user__household_id', 'to_user__household_id',
+        )
+        .annotate(total=Sum('amount'))
+    )
+
+    balances = defaultdict(Decimal)
+    for row in rows:
+        user_a_id, user_b_id, direction = pair_key(row['from_user_id'], row['to_user_id'])
+        household_id = row['household_id'] or household_for(row['from_user__household_id'], row['to_user__household_id'])
+        total = -row['total'] if row['is_settlement'] else row['total']
+        balances[(household_id, user_a_id, user_b_id)] += direction * total
+
+    return dict(balances)
@@ -0,0 +1,95 @@
+"""
+Content-addressed cache of extracted document text.
+
+Uploads are hashed with SHA-256; when the same bytes have been extracted
+before, the stored text is reused instead of running PDF parsing / OCR
+again. The store is bounded by DOCUMENT_CACHE_MAX_BYTES and evicts the
+least recently used entries first. Hits and misses are recorded per
+Document (`cache_hit`), so the counters survive restarts and are shared
+by every worker.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Document, ExtractionCacheEntry
+from .utils import is_extraction_error
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def hash_file(file_field):
+    """Streams a stored file through SHA-256 without loading it whole."""
+    digest = hashlib.sha256()
+    file_field.open('rb')
+    try:
+        for chunk in file_field.chunks():
+            digest.update(chunk)
+    finally:
+        file_field.seek(0)
+    return digest.hexdigest()
+
+
+def lookup(content_hash):
+    """Returns the cached text for `content_hash`, or None on a miss."""
+    entry = ExtractionCacheEntry.objects.filter(content_hash=content_hash).first()
+    if entry is None:
+        return None
+
+    ExtractionCacheEntry.objects.filter(content_hash=content_hash).update(
+        hit_count=F('hit_count') + 1, last_used_at=timezone.now()
+    )
+    return entry.extracted_text
+
+
+def store(content_hash, extracted_text):
+    """Caches a successful extraction and evicts old entries if over budget."""
+    if not content_hash or is_extraction_error(extracted_text):
+        return
+
+    ExtractionCacheEntry.objects.update_or_create(
+        content_hash=content_hash,
+        defaults={
+            'extracted_text': extracted_text,
+            'size_bytes': len(extracted_text.encode('utf-8')),
+            'last_used_at': timezone.now(),
+        },
+    )
+    evict()
+
+
+def evict(max_bytes=None):
+    """Deletes least recently used entries until the store fits in `max_bytes`."""
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'DOCUMENT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+
+    total = ExtractionCacheEntry.objects.aggregate(total=Sum('size_bytes'))['total'] or 0
+    if total <= max_bytes:
+        return 0
+
+    doomed = []
+    for content_hash, size_bytes in ExtractionCacheEntry.objects.order_by('last_used_at').values_list('content_hash', 'size_bytes').iterator():
+        if total <= max_bytes:
+            break
+        doomed.append(content_hash)
+        total -= size_bytes
+
+    ExtractionCacheEntry.objects.filter(content_hash__in=doomed).delete()
+    return len(doomed)
+
+
+def stats():
+    hashed = Document.objects.exclude(content_hash__isnull=True)
+    hits = hashed.filter(cache_hit=True).count()
+    misses = hashed.filter(cache_hit=False).count()
+    usage = ExtractionCacheEntry.objects.aggregate(total=Sum('size_bytes'))['total'] or 0
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        "entries": ExtractionCacheEntry.objects.count(),
+        "size_bytes": usage,
+        "max_bytes": getattr(settings, 'DOCUMENT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES),
+    }
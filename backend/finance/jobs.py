@@ -0,0 +1,198 @@
+"""
+Background runners for work that should not block a request.
+
+Splitwise syncs: SyncJob rows act as the queue, a view enqueues a job and
+returns at once, and the job is executed on a process-wide thread pool. A
+partial unique constraint on SyncJob keeps at most one queued/running sync
+per user.
+
+Document extraction: OCR and PDF parsing are CPU-bound, so they run on a
+bounded process pool and the Document row tracks pending -> processing ->
+done/failed. Documents stuck in processing past DOCUMENT_EXTRACTION_TIMEOUT
+are marked failed; `manage.py process_documents` re-runs pending and
+failed ones.
+"""
+import functools
+import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import document_cache
+from .models import Document, SyncJob
+from .splitwise_service import SplitwiseService
+from .utils import extract_text_from_path, is_extraction_error
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+_extraction_executor = None
+_extraction_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'SYNC_JOB_WORKERS', 2),
+                thread_name_prefix='splitwise-sync',
+            )
+        return _executor
+
+
+def enqueue_sync(user):
+    """
+    Queues a Splitwise sync for `user` and schedules it on the worker pool.
+    If the user already has a queued or running sync, that job is returned
+    instead of starting a second one; a queued one is handed to the pool
+    again in case the process that queued it has gone. Running jobs with no
+    heartbeat for SYNC_JOB_TIMEOUT are marked failed first, so a job lost to
+    a restart cannot block new syncs forever.
+    """
+    _expire_stale_jobs(user)
+    while True:
+        try:
+            with transaction.atomic():
+                job = SyncJob.objects.create(user=user)
+        except IntegrityError:
+            active = SyncJob.objects.filter(user=user, status__in=SyncJob.ACTIVE_STATUSES).first()
+            if active is not None:
+                if active.status == SyncJob.STATUS_QUEUED:
+                    # run_job only claims a queued job once, so a second submit is harmless.
+                    _get_executor().submit(run_job, active.id)
+                return active
+            # The active job finished between the insert and the lookup; try again.
+            continue
+
+        # Only hand the job to a worker once its row is visible to other connections.
+        transaction.on_commit(lambda: _get_executor().submit(run_job, job.id))
+        return job
+
+
+def _expire_stale_jobs(user):
+    # Queued jobs are not expired: they may just be waiting for a worker, and
+    # enqueue_sync resubmits them. Running jobs beat after every page.
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=getattr(settings, 'SYNC_JOB_TIMEOUT', 30 * 60))
+    SyncJob.objects.filter(user=user, status=SyncJob.STATUS_RUNNING).filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    ).update(
+        status=SyncJob.STATUS_FAILED,
+        result={"status": "error", "message": "Sync job did not finish in time and was abandoned."},
+        finished_at=now,
+    )
+
+
+def run_job(job_id):
+    """
+    Claims a queued job and runs the sync. Safe to call from any thread or
+    process: a job that is no longer queued is left untouched.
+    """
+    close_old_connections()
+    try:
+        now = timezone.now()
+        claimed = SyncJob.objects.filter(id=job_id, status=SyncJob.STATUS_QUEUED).update(
+            status=SyncJob.STATUS_RUNNING, started_at=now, heartbeat_at=now
+        )
+        if not claimed:
+            return
+
+        running = SyncJob.objects.filter(id=job_id, status=SyncJob.STATUS_RUNNING)
+
+        def heartbeat():
+            # False once the job has been expired as stale, which stops the sync.
+            return bool(running.update(heartbeat_at=timezone.now()))
+
+        job = SyncJob.objects.select_related('user').get(id=job_id)
+        try:
+            result = SplitwiseService(job.user).sync_expenses(heartbeat=heartbeat)
+        except Exception as e:
+            logger.exception("Splitwise sync job %s crashed", job_id)
+            result = {"status": "error", "message": str(e)}
+
+        finished = running.update(
+            status=SyncJob.STATUS_DONE if result.get("status") == "success" else SyncJob.STATUS_FAILED,
+            result=result,
+            finished_at=timezone.now(),
+        )
+        if not finished:
+            logger.warning("Splitwise sync job %s finished after being marked stale; result dropped", job_id)
+    finally:
+        connection.close()
+
+
+def _get_extraction_executor():
+    global _extraction_executor
+    with _extraction_executor_lock:
+        if _extraction_executor is None:
+            _extraction_executor = ProcessPoolExecutor(max_workers=getattr(settings, 'OCR_MAX_WORKERS', None))
+        return _extraction_executor
+
+
+def enqueue_extraction(document):
+    """Marks `document` as processing and sends its file to the extraction pool."""
+    now = timezone.now()
+    Document.objects.filter(id=document.id).update(status=Document.STATUS_PROCESSING, processing_started_at=now)
+    document.status = Document.STATUS_PROCESSING
+    document.processing_started_at = now
+
+    future = _get_extraction_executor().submit(extract_text_from_path, document.file.path)
+    # The hash computed at upload travels with the job, so the text is cached under the bytes actually read.
+    future.add_done_callback(functools.partial(_store_extraction, document.id, document.content_hash))
+
+
+def run_extraction(document):
+    """Extracts `document` in the calling process, e.g. from the process_documents command."""
+    Document.objects.filter(id=document.id).update(status=Document.STATUS_PROCESSING, processing_started_at=timezone.now())
+    future = Future()
+    try:
+        future.set_result(extract_text_from_path(document.file.path))
+    except Exception as e:
+        future.set_exception(e)
+    _store_extraction(document.id, document.content_hash, future)
+
+
+def expire_stale_extractions(documents=None):
+    """
+    Marks documents that have been processing for longer than
+    DOCUMENT_EXTRACTION_TIMEOUT as failed, e.g. after a restart or a dead
+    worker process. `documents` narrows the check to a queryset.
+
+    Returns:
+        int: Number of documents marked failed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'DOCUMENT_EXTRACTION_TIMEOUT', 15 * 60))
+    documents = Document.objects.all() if documents is None else documents
+    return documents.filter(status=Document.STATUS_PROCESSING, processing_started_at__lt=cutoff).update(
+        status=Document.STATUS_FAILED, error="Text extraction did not finish in time and was abandoned."
+    )
+
+
+def _store_extraction(document_id, content_hash, future):
+    # Runs on the pool's result thread, which keeps its own DB connection.
+    close_old_connections()
+    try:
+        text = future.result()
+    except Exception as e:
+        logger.exception("Text extraction for document %s failed", document_id)
+        Document.objects.filter(id=document_id).update(status=Document.STATUS_FAILED, error=str(e))
+        return
+
+    if is_extraction_error(text):
+        # extract_text_from_file reports failures as placeholder text rather than raising.
+        logger.warning("Text extraction for document %s failed: %s", document_id, text)
+        Document.objects.filter(id=document_id).update(status=Document.STATUS_FAILED, error=text)
+        return
+
+    Document.objects.filter(id=document_id).update(
+        extracted_text=text, is_processed=True, status=Document.STATUS_DONE, error=None
+    )
+    document_cache.store(content_hash, text)
@@ -0,0 +1,57 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from finance.balances import pair_key
+from finance.settlement import net_positions, simplify_debts
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the settle-up engine across household sizes and ledger lengths (in memory, no DB)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, nargs='+', default=[5, 50, 200, 1000])
+        parser.add_argument('--entries', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        self.stdout.write(f"{'members':>8} {'entries':>8} {'pairs':>8} {'transfers':>9} {'net ms':>8} {'plan ms':>8}")
+        for members in options['members']:
+            for entries in options['entries']:
+                balances = self._random_balances(rng, members, entries)
+
+                started = time.perf_counter()
+                positions = net_positions(
+                    (user_a_id, user_b_id, amount) for (user_a_id, user_b_id), amount in balances.items()
+                )
+                netted = time.perf_counter()
+                transfers = simplify_debts(positions)
+                planned = time.perf_counter()
+
+                self._verify(positions, transfers)
+                self.stdout.write(
+                    f"{members:>8} {entries:>8} {len(balances):>8} {len(transfers):>9} "
+                    f"{(netted - started) * 1000:>8.2f} {(planned - netted) * 1000:>8.2f}"
+                )
+
+    def _random_balances(self, rng, members, entries):
+        """Folds `entries` random ledger rows into pairwise balances, as the Balance table would."""
+        balances = {}
+        for _ in range(entries):
+            from_user, to_user = rng.sample(range(members), 2)
+            amount = Decimal(rng.randint(100, 500000)) / 100
+            user_a, user_b, direction = pair_key(from_user, to_user)
+            balances[(user_a, user_b)] = balances.get((user_a, user_b), 0) + direction * amount
+        return balances
+
+    def _verify(self, positions, transfers):
+        remaining = dict(positions)
+        for debtor, creditor, amount in transfers:
+            remaining[debtor] += amount
+            remaining[creditor] -= amount
+        assert not any(remaining.values()), "settle plan left non-zero positions"
+        assert len(transfers) < max(len(positions), 1), "settle plan exceeded n - 1 transfers"
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from finance.jobs import expire_stale_extractions, run_extraction
+from finance.models import Document
+
+
+class Command(BaseCommand):
+    help = "Extracts text for uploaded documents left pending, e.g. by a server restart."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help="Also re-run documents whose extraction failed or timed out.",
+        )
+
+    def handle(self, *args, **options):
+        expired = expire_stale_extractions()
+        self.stdout.write(f"Marked {expired} stale document(s) as failed.")
+
+        statuses = [Document.STATUS_PENDING]
+        if options['retry_failed']:
+            statuses.append(Document.STATUS_FAILED)
+        documents = list(
+            Document.objects.filter(status__in=statuses).exclude(file='').exclude(file__isnull=True).order_by('created_at')
+        )
+        for document in documents:
+            run_extraction(document)
+            document.refresh_from_db()
+            self.stdout.write(f"{document.id}: {document.status}")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(documents)} document(s)."))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from finance.jobs import run_job
+from finance.models import SyncJob
+
+
+class Command(BaseCommand):
+    help = "Runs queued Splitwise sync jobs, e.g. ones left behind by a server restart."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requeue-running',
+            action='store_true',
+            help="Reset jobs stuck in 'running' back to 'queued' first. Only use when no web worker is running.",
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue_running']:
+            requeued = SyncJob.objects.filter(status=SyncJob.STATUS_RUNNING).update(status=SyncJob.STATUS_QUEUED)
+            self.stdout.write(f"Requeued {requeued} running job(s).")
+
+        job_ids = list(
+            SyncJob.objects.filter(status=SyncJob.STATUS_QUEUED).order_by('created_at').values_list('id', flat=True)
+        )
+        for job_id in job_ids:
+            run_job(job_id)
+            job = SyncJob.objects.get(id=job_id)
+            self.stdout.write(f"{job_id}: {job.status}")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(job_ids)} job(s)."))
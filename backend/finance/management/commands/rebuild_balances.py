@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from finance.balances import compute_balances_from_ledger
+from finance.models import Balance
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the Balance table from the raw Ledger and verifies the two agree."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check-only',
+            action='store_true',
+            help="Only compare Balance against the Ledger; do not rewrite it.",
+        )
+
+    def handle(self, *args, **options):
+        if not options['check_only']:
+            expected = compute_balances_from_ledger()
+            with transaction.atomic():
+                Balance.objects.all().delete()
+                Balance.objects.bulk_create([
+                    Balance(household_id=household_id, user_a_id=user_a_id, user_b_id=user_b_id, amount=amount)
+                    for (household_id, user_a_id, user_b_id), amount in expected.items()
+                ])
+            self.stdout.write(f"Rebuilt {len(expected)} balance row(s).")
+
+        mismatches = self._compare()
+        if mismatches:
+            for key, stored, expected in mismatches:
+                self.stderr.write(f"{key}: stored={stored} ledger={expected}")
+            raise CommandError(f"{len(mismatches)} balance(s) disagree with the ledger.")
+
+        self.stdout.write(self.style.SUCCESS("Balance table matches the ledger."))
+
+    def _compare(self):
+        expected = compute_balances_from_ledger()
+        stored = {
+            (b.household_id, b.user_a_id, b.user_b_id): b.amount
+            for b in Balance.objects.all()
+        }
+
+        mismatches = []
+        for key in stored.keys() | expected.keys():
+            if stored.get(key, 0) != expected.get(key, 0):
+                mismatches.append((key, stored.get(key, 0), expected.get(key, 0)))
+        return mismatches
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_remove_splitwiselink_api_key_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='splitwiselink',
+            name='backfill_complete',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='splitwiselink',
+            name='high_water_mark',
+            field=models.DateTimeField(blank=True, help_text='Latest expense updated_at seen so far', null=True),
+        ),
+        migrations.AddField(
+            model_name='splitwiselink',
+            name='last_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='splitwiselink',
+            name='sync_offset',
+            field=models.PositiveIntegerField(default=0, help_text='Offset reached within the current sync pass'),
+        ),
+        migrations.AddField(
+            model_name='splitwiselink',
+            name='updated_after',
+            field=models.DateTimeField(blank=True, help_text='Lower bound of the current incremental pass', null=True),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:54
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+import uuid
+
+
+def populate_balances(apps, schema_editor):
+    # Frozen copy of finance.balances.compute_balances_from_ledger as of this
+    # migration; the live function uses fields (Ledger.household_id) that the
+    # historical model does not have yet.
+    Balance = apps.get_model('finance', 'Balance')
+    Ledger = apps.get_model('finance', 'Ledger')
+    rows = (
+        Ledger.objects
+        .values(
+            'from_user_id', 'to_user_id', 'is_settlement',
+            'from_user__household_id', 'to_user__household_id',
+        )
+        .annotate(total=Sum('amount'))
+    )
+
+    balances = defaultdict(Decimal)
+    for row in rows:
+        from_user_id, to_user_id = row['from_user_id'], row['to_user_id']
+        if str(from_user_id) < str(to_user_id):
+            user_a_id, user_b_id, direction = from_user_id, to_user_id, 1
+        else:
+            user_a_id, user_b_id, direction = to_user_id, from_user_id, -1
+        household_id = row['from_user__household_id']
+        if household_id == 'external':
+            household_id = row['to_user__household_id']
+        total = -row['total'] if row['is_settlement'] else row['total']
+        balances[(household_id, user_a_id, user_b_id)] += direction * total
+
+    Balance.objects.bulk_create([
+        Balance(household_id=household_id, user_a_id=user_a_id, user_b_id=user_b_id, amount=amount)
+        for (household_id, user_a_id, user_b_id), amount in balances.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_syncjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Balance',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('household_id', models.CharField(db_index=True, max_length=100)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='balance',
+            constraint=models.UniqueConstraint(fields=('household_id', 'user_a', 'user_b'), name='unique_balance_pair'),
+        ),
+        migrations.RunPython(populate_balances, migrations.RunPython.noop),
+    ]
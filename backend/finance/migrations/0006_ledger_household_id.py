@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_balance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ledger',
+            name='household_id',
+            field=models.CharField(blank=True, help_text='Household whose Balance this entry counts towards; derived from the users when empty', max_length=100, null=True),
+        ),
+    ]
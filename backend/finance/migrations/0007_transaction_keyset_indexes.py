@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0006_ledger_household_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['payer', '-date', '-id'], name='finance_txn_payer_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['payer', 'category', '-date', '-id'], name='finance_txn_payer_cat_idx'),
+        ),
+    ]
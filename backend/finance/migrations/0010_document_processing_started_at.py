@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0009_document_content_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, help_text='When the current extraction attempt was queued', null=True),
+        ),
+    ]
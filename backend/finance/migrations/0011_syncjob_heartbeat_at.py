@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0010_document_processing_started_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last sign of progress from a running job', null=True),
+        ),
+    ]
@@ -28,12 +28,59 @@ class Transaction(models.Model):
     receipt_url = models.URLField(blank=True, null=True)
     splitwise_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination and date-range filters over a payer's history.
+            models.Index(fields=['payer', '-date', '-id'], name='finance_txn_payer_date_idx'),
+            models.Index(fields=['payer', 'category', '-date', '-id'], name='finance_txn_payer_cat_idx'),
+        ]
+
 class SplitwiseLink(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='splitwise_link')
     oauth_token = models.CharField(max_length=255, help_text="OAuth Access Token")
     oauth_token_secret = models.CharField(max_length=255, help_text="OAuth Access Token Secret")
 
+    # Sync cursor: the first sync pages through the whole history by offset,
+    # later syncs only request expenses updated after the stored high-water mark.
+    backfill_complete = models.BooleanField(default=False)
+    sync_offset = models.PositiveIntegerField(default=0, help_text="Offset reached within the current sync pass")
+    updated_after = models.DateTimeField(null=True, blank=True, help_text="Lower bound of the current incremental pass")
+    high_water_mark = models.DateTimeField(null=True, blank=True, help_text="Latest expense updated_at seen so far")
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+
+class SyncJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sync_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last sign of progress from a running job")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # At most one queued/running sync per user.
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='unique_active_sync_job_per_user',
+            ),
+        ]
+
 class Ledger(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='ledger_entries')
@@ -43,6 +90,7 @@ class Ledger(models.Model):
     
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     is_settlement = models.BooleanField(default=False)
+    household_id = models.CharField(max_length=100, null=True, blank=True, help_text="Household whose Balance this entry counts towards; derived from the users when empty")
 
     class Meta:
         indexes = [
@@ -50,12 +98,59 @@ class Ledger(models.Model):
         ]
 
 class Document(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     file = models.FileField(upload_to='documents/', null=True, blank=True)
     text_content = models.TextField(blank=True, null=True, help_text="Raw text input (e.g. copied from messages)")
     extracted_text = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     is_processed = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    error = models.TextField(blank=True, null=True)
+    content_hash = models.CharField(max_length=64, blank=True, null=True, db_index=True, help_text="SHA-256 of the uploaded file")
+    cache_hit = models.BooleanField(default=False, help_text="Text was reused from an identical earlier upload")
+    processing_started_at = models.DateTimeField(null=True, blank=True, help_text="When the current extraction attempt was queued")
 
     def __str__(self):
         return f"Document {self.id}"
+
+class ExtractionCacheEntry(models.Model):
+    """
+    Extracted text for a file, keyed by the SHA-256 of its bytes, so
+    re-uploads of the same receipt or statement skip extraction.
+    Bounded in size with least-recently-used eviction (finance.document_cache).
+    """
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    extracted_text = models.TextField()
+    size_bytes = models.PositiveIntegerField()
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+class Balance(models.Model):
+    """
+    Net amount owed between two users, kept in step with Ledger writes by
+    finance.balances. Each pair is stored once with str(user_a_id) < str(user_b_id);
+    a positive amount means user_a owes user_b, a negative one the reverse.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    household_id = models.CharField(max_length=100, db_index=True)
+    user_a = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    user_b = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['household_id', 'user_a', 'user_b'], name='unique_balance_pair'),
+        ]
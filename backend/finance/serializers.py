@@ -1,5 +1,16 @@
 from rest_framework import serializers
-from .models import User, Category, Transaction, Ledger, Document, SplitwiseLink
+from .models import User, Category, Transaction, Ledger, Document, SplitwiseLink, SyncJob, Balance
+
+class SparseFieldsetMixin:
+    """Limits output to the comma-separated `?fields=` query parameter, when given."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested = request.query_params.get('fields') if request else None
+        if requested:
+            keep = {name.strip() for name in requested.split(',')}
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,7 +22,7 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = '__all__'
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category_details = CategorySerializer(source='category', read_only=True)
     class Meta:
         model = Transaction
@@ -26,8 +37,34 @@ class DocumentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Document
         fields = '__all__'
+        # Set by the extraction job and the dedup cache, never by clients.
+        read_only_fields = ['status', 'error', 'content_hash', 'cache_hit', 'processing_started_at']
 
 class SplitwiseLinkSerializer(serializers.ModelSerializer):
     class Meta:
         model = SplitwiseLink
         fields = ['api_key']
+
+class SyncJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SyncJob
+        fields = ['id', 'status', 'result', 'created_at', 'started_at', 'finished_at']
+
+class BalanceSerializer(serializers.ModelSerializer):
+    """Presents a stored pair as 'debtor owes creditor amount'."""
+    debtor = serializers.SerializerMethodField()
+    creditor = serializers.SerializerMethodField()
+    amount = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Balance
+        fields = ['id', 'household_id', 'debtor', 'creditor', 'amount', 'updated_at']
+
+    def get_debtor(self, obj):
+        return str(obj.user_a_id if obj.amount > 0 else obj.user_b_id)
+
+    def get_creditor(self, obj):
+        return str(obj.user_b_id if obj.amount > 0 else obj.user_a_id)
+
+    def get_amount(self, obj):
+        return str(abs(obj.amount))
@@ -0,0 +1,134 @@
+"""
+Debt simplification for household settle-up.
+
+The household's pairwise balances are collapsed into one net position per
+member, and a greedy min-cash-flow pass repeatedly matches the largest
+debtor with the largest creditor. Both sides are kept in heaps, so a plan
+for n members costs O(n log n) and has at most n - 1 transfers.
+"""
+import heapq
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .balances import apply_ledger_entries, pair_key
+from .models import Balance, Ledger, Transaction, User
+
+
+def net_positions(balances):
+    """
+    Converts (user_a_id, user_b_id, amount) triples, where a positive amount
+    means user_a owes user_b, into {user_id: net}. A positive net means the
+    user is owed money, a negative one that they owe it.
+    """
+    positions = defaultdict(Decimal)
+    for user_a_id, user_b_id, amount in balances:
+        positions[user_a_id] -= amount
+        positions[user_b_id] += amount
+    return positions
+
+
+def simplify_debts(positions):
+    """
+    Returns a list of (debtor_id, creditor_id, amount) transfers that
+    settles every net position in `positions`.
+    """
+    # heapq is a min-heap, so amounts are negated to pop the largest first.
+    # The str(user_id) tie-breaker keeps plans deterministic.
+    creditors = [(-net, str(user_id), user_id) for user_id, net in positions.items() if net > 0]
+    debtors = [(net, str(user_id), user_id) for user_id, net in positions.items() if net < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    transfers = []
+    while creditors and debtors:
+        credit, credit_key, creditor_id = heapq.heappop(creditors)
+        debt, debt_key, debtor_id = heapq.heappop(debtors)
+
+        amount = min(-credit, -debt)
+        transfers.append((debtor_id, creditor_id, amount))
+
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, credit_key, creditor_id))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debt_key, debtor_id))
+
+    return transfers
+
+
+def household_balances(household_id, lock=False):
+    """Non-zero (user_a_id, user_b_id, amount) rows of the household's Balance table."""
+    balances = Balance.objects.filter(household_id=household_id).exclude(amount=0)
+    if lock:
+        balances = balances.select_for_update()
+    return list(balances.values_list('user_a_id', 'user_b_id', 'amount'))
+
+
+def household_settle_plan(household_id, lock=False):
+    """Builds the settle-up plan for a household from the Balance table."""
+    return simplify_debts(net_positions(household_balances(household_id, lock=lock)))
+
+
+def offsetting_entries(balances, transfers):
+    """
+    Returns (from_user_id, to_user_id, amount) settlements that clear the
+    pairwise balances left over once `transfers` are recorded. Simplified
+    transfers can run between members who never owed each other (A owes B
+    and B owes C settles as A -> C), so without these rows the pairs would
+    still show debts in a circle even though every net position is zero.
+    """
+    residual = defaultdict(Decimal)
+    for user_a_id, user_b_id, amount in balances:
+        residual[user_a_id, user_b_id] += amount
+    for debtor_id, creditor_id, amount in transfers:
+        user_a_id, user_b_id, direction = pair_key(debtor_id, creditor_id)
+        residual[user_a_id, user_b_id] -= direction * amount
+
+    offsets = []
+    for (user_a_id, user_b_id), amount in residual.items():
+        if amount > 0:
+            offsets.append((user_a_id, user_b_id, amount))
+        elif amount < 0:
+            offsets.append((user_b_id, user_a_id, -amount))
+    return offsets
+
+
+def settle_household(household_id, recorded_by):
+    """
+    Computes the plan and records it as settlement Ledger rows under a single
+    'Settle up' Transaction, updating Balance in the same DB transaction.
+    Offsetting settlement rows are added so that every pair's Balance ends
+    at zero, not just every member's net position.
+    Returns the created Ledger rows.
+    """
+    with transaction.atomic():
+        balances = household_balances(household_id, lock=True)
+        transfers = simplify_debts(net_positions(balances))
+        if not transfers:
+            return []
+        settlements = transfers + offsetting_entries(balances, transfers)
+
+        users = User.objects.in_bulk({user_id for settlement in settlements for user_id in settlement[:2]})
+
+        settlement = Transaction.objects.create(
+            description="Settle up",
+            total_amount=sum(amount for _, _, amount in transfers),
+            payer=recorded_by,
+            date=timezone.now(),
+        )
+        entries = Ledger.objects.bulk_create([
+            Ledger(
+                transaction=settlement,
+                from_user=users[from_user_id],
+                to_user=users[to_user_id],
+                amount=amount,
+                is_settlement=True,
+                household_id=household_id,
+            )
+            for from_user_id, to_user_id, amount in settlements
+        ])
+        apply_ledger_entries(entries)
+
+    return entries
@@ -1,7 +1,8 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import User as FinanceUser
+from .models import User as FinanceUser, Ledger
+from .balances import apply_ledger_entries
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_finance_user(sender, instance, created, **kwargs):
@@ -14,3 +15,13 @@ def create_finance_user(sender, instance, created, **kwargs):
             email=instance.email,
             household_id='default_household'
         )
+
+@receiver(post_save, sender=Ledger)
+def add_ledger_entry_to_balance(sender, instance, created, **kwargs):
+    # Bulk inserts skip signals; those callers apply their entries explicitly.
+    if created:
+        apply_ledger_entries([instance])
+
+@receiver(post_delete, sender=Ledger)
+def remove_ledger_entry_from_balance(sender, instance, **kwargs):
+    apply_ledger_entries([instance], sign=-1)
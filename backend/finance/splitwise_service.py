@@ -1,9 +1,63 @@
 from splitwiz import Splitwise
 from .models import Transaction, Ledger, SplitwiseLink, User, Category
+from .balances import apply_ledger_entries
 from decimal import Decimal
+from django.db import transaction
 from django.utils import timezone
 from datetime import datetime
 
+# Number of expenses requested from the Splitwise API per round-trip.
+SYNC_PAGE_SIZE = 100
+
+
+def _parse_splitwise_datetime(value):
+    """Parses an ISO-8601 timestamp from the Splitwise API, returning None if invalid."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+class ExternalUserResolver:
+    """
+    Identity map from Splitwise user ids to local Users for a single sync run.
+    Placeholder users for roommates without an account are looked up and
+    created in bulk per page, then served from memory.
+    """
+    def __init__(self, local_user, local_splitwise_id):
+        self._users = {local_splitwise_id: local_user}
+
+    @staticmethod
+    def email_for(splitwise_id):
+        return f"splitwise_{splitwise_id}@external.com"
+
+    def prefetch(self, names_by_id):
+        """Loads or creates users for every unseen Splitwise id in `names_by_id`."""
+        missing = {self.email_for(sid): sid for sid in names_by_id if sid not in self._users}
+        if not missing:
+            return
+
+        for user in User.objects.filter(email__in=missing.keys()):
+            self._users[missing.pop(user.email)] = user
+
+        new_users = []
+        for email, sid in missing.items():
+            user = User(username=email, email=email, first_name=names_by_id[sid] or "", household_id='external')
+            user.set_unusable_password()
+            new_users.append(user)
+        # A concurrent sync for another household member may create the same
+        # placeholders; skip those rows and read back whichever row won.
+        User.objects.bulk_create(new_users, ignore_conflicts=True)
+
+        for user in User.objects.filter(email__in=missing.keys()):
+            self._users[missing[user.email]] = user
+
+    def get(self, splitwise_id):
+        return self._users[splitwise_id]
+
+
 class SplitwiseService:
     def __init__(self, user):
         self.user = user
@@ -22,80 +76,159 @@ class SplitwiseService:
         except SplitwiseLink.DoesNotExist:
             self.client = None
 
-    def sync_expenses(self):
+    def sync_expenses(self, heartbeat=None):
+        """
+        Args:
+            heartbeat (callable, optional): Called after each committed page; returning
+                False stops the sync (e.g. its job was given up on as stale).
+        """
         if not self.client:
             return {"status": "error", "message": "No Splitwise account linked."}
 
         try:
             current_user = self.client.getCurrentUser()
-            my_splitwise_id = current_user.getId()
-            
-            expenses = self.client.getExpenses(limit=20)
-            
+            users = ExternalUserResolver(self.user, current_user.getId())
+
             synced_count = 0
-            
-            for exp in expenses:
-                if Transaction.objects.filter(splitwise_id=str(exp.getId())).exists():
-                    continue
 
-                payer_id = None
-                for u in exp.getUsers():
-                    if u.getPaidShare() > 0:
-                        payer_id = u.getId()
-                        break
-                
-                payer_db = self.user if payer_id == my_splitwise_id else None
-                
-                users_involved = exp.getUsers()
-                
-                if payer_db is None:
-                    paid_user_splitwise = next((u for u in users_involved if u.getId() == payer_id), None)
-                    name = paid_user_splitwise.getFirstName() if paid_user_splitwise else "Unknown"
-                    payer_db, _ = User.objects.get_or_create(
-                        email=f"splitwise_{payer_id}@external.com",
-                        defaults={'name': name, 'household_id': 'external'}
-                    )
-
-                date_str = exp.getDate() 
-                try:
-                    dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                except:
-                    dt = timezone.now()
-
-                transaction = Transaction.objects.create(
-                    description=exp.getDescription(),
-                    total_amount=Decimal(exp.getCost()),
-                    payer=payer_db,
-                    date=dt,
-                    splitwise_id=str(exp.getId())
-                )
-
-                for u in users_involved:
-                    user_share = Decimal(u.getOwedShare())
-                    if user_share == 0:
-                        continue
-                        
-                    u_splitwise_id = u.getId()
-                    if u_splitwise_id == my_splitwise_id:
-                        db_user = self.user
-                    else:
-                        db_user, _ = User.objects.get_or_create(
-                            email=f"splitwise_{u_splitwise_id}@external.com",
-                            defaults={'name': u.getFirstName(), 'household_id': 'external'}
-                        )
-                    
-                    if db_user != payer_db:
-                        Ledger.objects.create(
-                            transaction=transaction,
-                            from_user=db_user,
-                            to_user=payer_db,
-                            amount=user_share,
-                            is_settlement=False
-                        )
-                
-                synced_count += 1
-            
+            # Page through the remote history, persisting the cursor after each
+            # page so an interrupted sync resumes where it stopped.
+            while True:
+                expenses = self._fetch_expense_page()
+                with transaction.atomic():
+                    synced_count += self._import_expenses(expenses, users)
+                    self._advance_cursor(expenses)
+                if len(expenses) < SYNC_PAGE_SIZE:
+                    break
+                if heartbeat and heartbeat() is False:
+                    return {"status": "error", "message": "Sync stopped: its job was marked as abandoned."}
+
+            self._finish_sync_pass()
             return {"status": "success", "synced": synced_count}
 
         except Exception as e:
             return {"status": "error", "message": str(e)}
+
+    def _fetch_expense_page(self):
+        """
+        Fetches the next page of expenses for the current sync pass.
+        Until the initial backfill completes the whole history is walked by
+        offset; afterwards only expenses updated after the cursor are requested.
+        """
+        params = {'offset': self.link.sync_offset, 'limit': SYNC_PAGE_SIZE}
+        if self.link.backfill_complete and self.link.updated_after:
+            params['updated_after'] = self.link.updated_after.isoformat()
+        return self.client.getExpenses(**params)
+
+    def _advance_cursor(self, expenses):
+        self.link.sync_offset += len(expenses)
+        for exp in expenses:
+            updated_at = _parse_splitwise_datetime(exp.getUpdatedAt())
+            if updated_at and (self.link.high_water_mark is None or updated_at > self.link.high_water_mark):
+                self.link.high_water_mark = updated_at
+        self.link.save(update_fields=['sync_offset', 'high_water_mark'])
+
+    def _finish_sync_pass(self):
+        self.link.backfill_complete = True
+        self.link.sync_offset = 0
+        self.link.updated_after = self.link.high_water_mark
+        self.link.last_synced_at = timezone.now()
+        self.link.save(update_fields=['backfill_complete', 'sync_offset', 'updated_after', 'last_synced_at'])
+
+    def _import_expenses(self, expenses, users):
+        """
+        Imports one page of expenses. Existing rows are looked up with a
+        single query and new Transaction/Ledger rows are written with
+        bulk_create, so a page costs a fixed number of queries plus the
+        edited and deleted expenses it contains.
+
+        Expenses already synced are updated in place: their Ledger rows are
+        replaced, so Balance is reversed for the old split and applied for
+        the new one. Expenses deleted in Splitwise are removed along with
+        their Ledger rows, or skipped if they were never imported.
+        """
+        existing = {
+            txn.splitwise_id: txn
+            for txn in Transaction.objects.filter(splitwise_id__in=[str(exp.getId()) for exp in expenses])
+        }
+
+        pending = []
+        deleted = []
+        names_by_id = {}
+        seen = set()
+
+        for exp in expenses:
+            splitwise_id = str(exp.getId())
+            if splitwise_id in seen:
+                continue
+            seen.add(splitwise_id)
+
+            if exp.getDeletedAt():
+                if splitwise_id in existing:
+                    deleted.append(existing[splitwise_id].id)
+                continue
+
+            users_involved = exp.getUsers()
+
+            payer_id = None
+            for u in users_involved:
+                if Decimal(u.getPaidShare()) > 0:
+                    payer_id = u.getId()
+                    break
+
+            for u in users_involved:
+                names_by_id.setdefault(u.getId(), u.getFirstName())
+            names_by_id.setdefault(payer_id, "Unknown")
+
+            pending.append((exp, splitwise_id, payer_id, users_involved))
+
+        users.prefetch(names_by_id)
+
+        new_transactions = []
+        changed_transactions = []
+        new_ledger_entries = []
+
+        for exp, splitwise_id, payer_id, users_involved in pending:
+            payer_db = users.get(payer_id)
+            dt = _parse_splitwise_datetime(exp.getDate()) or timezone.now()
+
+            txn = existing.get(splitwise_id)
+            if txn is None:
+                txn = Transaction(splitwise_id=splitwise_id)
+                new_transactions.append(txn)
+            else:
+                changed_transactions.append(txn)
+            txn.description = exp.getDescription()
+            txn.total_amount = Decimal(exp.getCost())
+            txn.payer = payer_db
+            txn.date = dt
+
+            for u in users_involved:
+                user_share = Decimal(u.getOwedShare())
+                if user_share == 0:
+                    continue
+
+                db_user = users.get(u.getId())
+                if db_user != payer_db:
+                    new_ledger_entries.append(Ledger(
+                        transaction=txn,
+                        from_user=db_user,
+                        to_user=payer_db,
+                        amount=user_share,
+                        is_settlement=False,
+                        household_id=self.user.household_id
+                    ))
+
+        # Queryset deletes send post_delete per Ledger row, and the receiver in
+        # finance.signals reverses each one out of Balance.
+        if changed_transactions:
+            Ledger.objects.filter(transaction__in=changed_transactions).delete()
+            Transaction.objects.bulk_update(changed_transactions, ['description', 'total_amount', 'payer', 'date'])
+        if deleted:
+            Transaction.objects.filter(id__in=deleted).delete()
+
+        Transaction.objects.bulk_create(new_transactions)
+        Ledger.objects.bulk_create(new_ledger_entries)
+        apply_ledger_entries(new_ledger_entries)
+
+        return len(new_transactions) + len(changed_transactions) + len(deleted)
@@ -1,3 +1,195 @@
 from django.test import TestCase
 
-# Create your tests here.
+from decimal import Decimal
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from . import jobs
+
+from .balances import compute_balances_from_ledger, pair_key
+from .models import Balance, Document, Ledger, SplitwiseLink, SyncJob, Transaction, User
+from .serializers import DocumentSerializer
+from .splitwise_service import SplitwiseService
+
+
+class FakeExpenseUser:
+    """Mimics splitwise.user.ExpenseUser, which returns shares as strings."""
+    def __init__(self, user_id, paid_share, owed_share, first_name="Roommate"):
+        self.user_id = user_id
+        self.paid_share = paid_share
+        self.owed_share = owed_share
+        self.first_name = first_name
+
+    def getId(self):
+        return self.user_id
+
+    def getPaidShare(self):
+        return self.paid_share
+
+    def getOwedShare(self):
+        return self.owed_share
+
+    def getFirstName(self):
+        return self.first_name
+
+
+class FakeExpense:
+    """Mimics splitwise.expense.Expense: cost and timestamps are strings."""
+    def __init__(self, expense_id, cost, users, updated_at, deleted_at=None):
+        self.expense_id = expense_id
+        self.cost = cost
+        self.users = users
+        self.updated_at = updated_at
+        self.deleted_at = deleted_at
+
+    def getId(self):
+        return self.expense_id
+
+    def getCost(self):
+        return self.cost
+
+    def getUsers(self):
+        return self.users
+
+    def getDescription(self):
+        return f"Expense {self.expense_id}"
+
+    def getDate(self):
+        return "2025-01-01T12:00:00Z"
+
+    def getUpdatedAt(self):
+        return self.updated_at
+
+    def getDeletedAt(self):
+        return self.deleted_at
+
+
+class FakeCurrentUser:
+    def getId(self):
+        return 1
+
+
+class FakeSplitwiseClient:
+    def __init__(self, expenses):
+        self.expenses = expenses
+
+    def getCurrentUser(self):
+        return FakeCurrentUser()
+
+    def getExpenses(self, offset=0, limit=20, updated_after=None):
+        expenses = self.expenses
+        if updated_after:
+            cursor = datetime.fromisoformat(updated_after)
+            expenses = [e for e in expenses if datetime.fromisoformat(e.updated_at.replace('Z', '+00:00')) > cursor]
+        return expenses[offset:offset + limit]
+
+
+class SplitwiseSyncTests(TestCase):
+    def setUp(self):
+        # bulk_create skips the post_save receivers in finance.signals.
+        self.user, = User.objects.bulk_create([User(username="me", email="me@example.com", household_id="home")])
+        SplitwiseLink.objects.create(user=self.user, oauth_token="token", oauth_token_secret="secret")
+
+    def sync(self, expenses):
+        service = SplitwiseService(User.objects.get(pk=self.user.pk))
+        service.client = FakeSplitwiseClient(expenses)
+        return service.sync_expenses()
+
+    def balances(self):
+        return {
+            (b.household_id, b.user_a_id, b.user_b_id): b.amount
+            for b in Balance.objects.exclude(amount=0)
+        }
+
+    def assertBalancesMatchLedger(self):
+        expected = {key: amount for key, amount in compute_balances_from_ledger().items() if amount}
+        self.assertEqual(self.balances(), expected)
+
+    def test_string_shares_are_imported_and_edits_and_deletes_applied(self):
+        expenses = [
+            FakeExpense(1, "30.00", [FakeExpenseUser(1, "30.00", "10.00"), FakeExpenseUser(7, "0.00", "20.00", "Sam")],
+                        "2025-01-01T12:00:00Z"),
+            FakeExpense(2, "30.00", [FakeExpenseUser(1, "0.00", "15.00"), FakeExpenseUser(8, "30.00", "15.00", "Ana")],
+                        "2025-01-01T12:00:00Z"),
+            FakeExpense(3, "12.00", [FakeExpenseUser(1, "12.00", "6.00"), FakeExpenseUser(7, "0.00", "6.00", "Sam")],
+                        "2025-01-01T12:00:00Z", deleted_at="2025-01-01T13:00:00Z"),
+        ]
+        self.assertEqual(self.sync(expenses), {"status": "success", "synced": 2})
+        self.assertEqual(sorted(Transaction.objects.values_list("splitwise_id", flat=True)), ["1", "2"])
+        self.assertEqual(sorted(Ledger.objects.values_list("amount", flat=True)), [Decimal("15.00"), Decimal("20.00")])
+        self.assertBalancesMatchLedger()
+
+        # Expense 1 is re-split with Ana at a new cost, expense 2 is deleted.
+        expenses[0] = FakeExpense(1, "60.00", [FakeExpenseUser(1, "60.00", "20.00"),
+                                               FakeExpenseUser(8, "0.00", "40.00", "Ana")], "2025-02-01T12:00:00Z")
+        expenses[1] = FakeExpense(2, "30.00", expenses[1].users, "2025-02-01T12:00:00Z",
+                                  deleted_at="2025-02-01T12:00:00Z")
+        self.assertEqual(self.sync(expenses), {"status": "success", "synced": 2})
+
+        txn = Transaction.objects.get()
+        self.assertEqual((txn.splitwise_id, txn.total_amount), ("1", Decimal("60.00")))
+        entry = Ledger.objects.select_related("from_user").get()
+        self.assertEqual((entry.from_user.first_name, entry.amount), ("Ana", Decimal("40.00")))
+        user_a_id, user_b_id, direction = pair_key(entry.from_user_id, self.user.pk)
+        self.assertEqual(self.balances(), {("home", user_a_id, user_b_id): direction * Decimal("40.00")})
+        self.assertBalancesMatchLedger()
+
+
+class DocumentSerializerTests(TestCase):
+    def test_processing_fields_are_read_only(self):
+        serializer = DocumentSerializer(data={
+            "text_content": "Paid 50 for groceries",
+            "status": Document.STATUS_DONE,
+            "error": "x",
+            "content_hash": "0" * 64,
+            "cache_hit": True,
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        document = serializer.save()
+        self.assertEqual((document.status, document.error, document.content_hash, document.cache_hit),
+                         (Document.STATUS_PENDING, None, None, False))
+
+        serializer = DocumentSerializer(document, data={"status": Document.STATUS_PROCESSING, "content_hash": "1" * 64},
+                                        partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        document.refresh_from_db()
+        self.assertEqual((document.status, document.content_hash), (Document.STATUS_PENDING, None))
+
+
+class SyncJobTests(TestCase):
+    def setUp(self):
+        self.user, = User.objects.bulk_create([User(username="me", email="me@example.com", household_id="home")])
+
+    def test_stale_running_job_is_expired_and_its_late_result_dropped(self):
+        stale = SyncJob.objects.create(user=self.user, status=SyncJob.STATUS_RUNNING,
+                                       started_at=timezone.now() - timedelta(hours=2),
+                                       heartbeat_at=timezone.now() - timedelta(hours=1))
+        alive = SyncJob.objects.create(user=User.objects.bulk_create([User(username="u2", email="u2@example.com")])[0],
+                                       status=SyncJob.STATUS_RUNNING,
+                                       started_at=timezone.now() - timedelta(hours=2), heartbeat_at=timezone.now())
+
+        with mock.patch.object(jobs, "_get_executor"):
+            new_job = jobs.enqueue_sync(self.user)
+            jobs.enqueue_sync(alive.user)
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual((stale.status, alive.status), (SyncJob.STATUS_FAILED, SyncJob.STATUS_RUNNING))
+        self.assertNotEqual(new_job.id, stale.id)
+
+    def test_job_expired_while_running_keeps_failed_status(self):
+        job = SyncJob.objects.create(user=self.user)
+
+        def sync_expenses(service, heartbeat=None):
+            # Another request expires the job while it is still running.
+            SyncJob.objects.filter(id=job.id).update(status=SyncJob.STATUS_FAILED)
+            self.assertFalse(heartbeat())
+            return {"status": "success", "synced": 0}
+
+        with mock.patch.object(jobs.SplitwiseService, "sync_expenses", sync_expenses), \
+                mock.patch.object(jobs.connection, "close"):
+            jobs.run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), (SyncJob.STATUS_FAILED, None))
@@ -1,10 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DocumentViewSet, SplitwiseViewSet, GoogleLogin
+from .views import DocumentViewSet, SplitwiseViewSet, BalanceViewSet, HouseholdViewSet, TransactionViewSet, GoogleLogin
 
 router = DefaultRouter()
 router.register(r'documents', DocumentViewSet)
+router.register(r'transactions', TransactionViewSet, basename='transaction')
 router.register(r'splitwise', SplitwiseViewSet, basename='splitwise')
+router.register(r'balances', BalanceViewSet, basename='balance')
+router.register(r'households', HouseholdViewSet, basename='household')
 
 urlpatterns = [
     path('api/', include(router.urls)),
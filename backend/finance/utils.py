@@ -1,7 +1,13 @@
 import pytesseract
 from PIL import Image
 from pypdf import PdfReader
+from concurrent.futures import ThreadPoolExecutor
 import io
+import os
+
+# Tesseract runs as a subprocess, so OCR of scanned pages overlaps well on
+# threads. Text-layer extraction is pure Python and stays serial.
+PDF_OCR_WORKERS = min(8, os.cpu_count() or 1)
 
 def extract_text_from_file(file_obj):
     """
@@ -11,20 +17,70 @@ def extract_text_from_file(file_obj):
     text = ""
     try:
         if file_obj.name.lower().endswith('.pdf'):
-            reader = PdfReader(file_obj)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
+            text = extract_text_from_pdf(file_obj)
         elif file_obj.name.lower().endswith(('.png', '.jpg', '.jpeg')):
             image = Image.open(file_obj)
             # Tesseract might not be in PATH, so this could fail if not installed on OS.
-            # We wrap in try-except specific to tesseract if needed, but for now generic.
-            try:
-                text = pytesseract.image_to_string(image)
-            except Exception as e:
-                text = f"[OCR Failed: {str(e)}]. Please ensure Tesseract-OCR is installed on the server."
+            text = _ocr_image(image)
         else:
              text = "[Unsupported file type for automated extraction]"
     except Exception as e:
         text = f"[Extraction Error: {str(e)}]"
     
     return text
+
+
+def extract_text_from_pdf(file_obj):
+    """
+    Extracts text from every page of a PDF. Pages with an embedded text
+    layer are read serially from one reader; pages without one (scans) have
+    their embedded images OCR'd on a thread pool. Page texts are joined once,
+    in page order.
+    """
+    reader = PdfReader(file_obj)
+    page_texts = []
+    ocr_jobs = {}
+    for number, page in enumerate(reader.pages):
+        text = page.extract_text() or ""
+        if not text.strip():
+            # No text layer: this is a scanned page, so OCR the images it carries.
+            try:
+                ocr_jobs[number] = [image_file.image for image_file in page.images]
+            except Exception as e:
+                text = f"[Image Extraction Failed: {str(e)}]"
+        page_texts.append(text)
+
+    if len(ocr_jobs) == 1:
+        for number, images in ocr_jobs.items():
+            page_texts[number] = _ocr_images(images)
+    elif ocr_jobs:
+        with ThreadPoolExecutor(max_workers=min(PDF_OCR_WORKERS, len(ocr_jobs))) as pool:
+            for number, text in zip(ocr_jobs, pool.map(_ocr_images, ocr_jobs.values())):
+                page_texts[number] = text
+
+    return "".join(page_text + "\n" for page_text in page_texts)
+
+
+def _ocr_images(images):
+    return "\n".join(_ocr_image(image) for image in images)
+
+
+def _ocr_image(image):
+    try:
+        return pytesseract.image_to_string(image)
+    except Exception as e:
+        return f"[OCR Failed: {str(e)}]. Please ensure Tesseract-OCR is installed on the server."
+
+
+def is_extraction_error(text):
+    """True if `text` is one of the placeholder messages above rather than real content."""
+    return text.startswith(("[OCR Failed", "[Extraction Error", "[Unsupported file type", "[Image Extraction Failed"))
+
+
+def extract_text_from_path(path):
+    """
+    Extracts text from a file on disk. Takes a plain path so it can be
+    shipped to a worker process without Django being set up there.
+    """
+    with open(path, 'rb') as file_obj:
+        return extract_text_from_file(file_obj)
@@ -2,10 +2,21 @@ from rest_framework import viewsets, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from .models import User, Category, Transaction, Ledger, Document, SplitwiseLink
-from .serializers import UserSerializer, CategorySerializer, TransactionSerializer, LedgerSerializer, DocumentSerializer, SplitwiseLinkSerializer
-from .utils import extract_text_from_file
-from .splitwise_service import SplitwiseService
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time
+from decimal import Decimal
+import uuid
+from .models import User, Category, Transaction, Ledger, Document, SplitwiseLink, SyncJob, Balance
+from .serializers import UserSerializer, CategorySerializer, TransactionSerializer, LedgerSerializer, DocumentSerializer, SplitwiseLinkSerializer, SyncJobSerializer, BalanceSerializer
+from . import document_cache
+from .jobs import enqueue_sync, enqueue_extraction, expire_stale_extractions
+from .pagination import DateIdCursorPagination
+from .settlement import household_settle_plan, settle_household
 import random
 
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
@@ -54,9 +65,10 @@ class SplitwiseViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['post'])
     def callback(self, request):
         """
-        Step 2: Exchange Tokens and Sync
+        Step 2: Exchange Tokens and Queue Sync
         Frontend receives 'oauth_token' and 'oauth_verifier' from Splitwise redirect.
-        It sends them here to finalize auth and trigger sync.
+        It sends them here to finalize auth. The sync runs in the background;
+        poll `jobs/<job_id>/` for its status.
         """
         oauth_token = request.data.get('oauth_token')
         oauth_verifier = request.data.get('oauth_verifier')
@@ -92,18 +104,33 @@ class SplitwiseViewSet(viewsets.ViewSet):
                 }
             )
             
-            # Trigger Sync
-            service = SplitwiseService(request.user)
-            result = service.sync_expenses()
+            # Queue Sync (returns the running job if one is already in flight)
+            job = enqueue_sync(request.user)
             
             return Response({
-                "status": "connected_and_synced", 
-                "sync_result": result
-            })
+                "status": "connected",
+                "job_id": str(job.id),
+                "job_status": job.status
+            }, status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
             return Response({"error": f"Auth failed: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['get'], url_path=r'jobs/(?P<job_id>[0-9a-f-]+)')
+    def job_status(self, request, job_id=None):
+        """
+        Step 3: Poll Sync Status
+        Returns the state of a sync job queued by the callback.
+        """
+        if not request.user.is_authenticated:
+             return Response({"error": "User must be authenticated"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        job = SyncJob.objects.filter(id=job_id, user=request.user).first()
+        if job is None:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(SyncJobSerializer(job).data)
+
 
 class DocumentViewSet(viewsets.ModelViewSet):
     queryset = Document.objects.all()
@@ -112,23 +139,146 @@ class DocumentViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         instance = serializer.save()
         
-        extracted = ""
         if instance.file:
-            extracted = extract_text_from_file(instance.file)
+            instance.content_hash = document_cache.hash_file(instance.file)
+            cached_text = document_cache.lookup(instance.content_hash)
+            if cached_text is not None:
+                # Same bytes were extracted before; reuse that result.
+                instance.extracted_text = cached_text
+                instance.is_processed = True
+                instance.status = Document.STATUS_DONE
+                instance.cache_hit = True
+                instance.save()
+                return
+
+            instance.save(update_fields=['content_hash'])
+            # Extraction runs in the background; poll `status/` for the result.
+            transaction.on_commit(lambda: enqueue_extraction(instance))
         elif instance.text_content:
-            extracted = instance.text_content
-        
-        if extracted:
-            instance.extracted_text = extracted
+            instance.extracted_text = instance.text_content
             instance.is_processed = True
+            instance.status = Document.STATUS_DONE
             instance.save()
 
+    @action(detail=True, methods=['get'], url_path='status')
+    def processing_status(self, request, pk=None):
+        """
+        Lightweight polling endpoint for the extraction state of a document.
+        A document that has been processing for too long is reported as failed.
+        """
+        document = self.get_object()
+        if expire_stale_extractions(Document.objects.filter(id=document.id)):
+            document.refresh_from_db()
+        return Response({
+            "id": str(document.id),
+            "status": document.status,
+            "is_processed": document.is_processed,
+            "error": document.error,
+        })
+
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request):
+        """
+        Hit/miss counters and usage of the extracted-text dedup cache.
+        """
+        return Response(document_cache.stats())
+
 class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
     """
-    Returns only transactions belonging to the authenticated user.
+    Returns only transactions belonging to the authenticated user, newest first,
+    in cursor-paginated pages.
+
+    Query params: date_from, date_to (ISO date or datetime), category (id),
+    min_amount, max_amount, fields (comma-separated sparse fieldset),
+    page_size and cursor.
     """
     serializer_class = TransactionSerializer
+    pagination_class = DateIdCursorPagination
+    permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         # Assuming request.user is a Finance User instance
-        return Transaction.objects.filter(payer=self.request.user)
\ No newline at end of file
+        queryset = Transaction.objects.filter(payer=self.request.user).select_related('category')
+        params = self.request.query_params
+
+        if params.get('date_from'):
+            queryset = queryset.filter(date__gte=_parse_date_param(params, 'date_from'))
+        if params.get('date_to'):
+            queryset = queryset.filter(date__lte=_parse_date_param(params, 'date_to', end_of_day=True))
+        if params.get('category'):
+            queryset = queryset.filter(category_id=_parse_param(params, 'category', uuid.UUID))
+        if params.get('min_amount'):
+            queryset = queryset.filter(total_amount__gte=_parse_param(params, 'min_amount', Decimal))
+        if params.get('max_amount'):
+            queryset = queryset.filter(total_amount__lte=_parse_param(params, 'max_amount', Decimal))
+
+        return queryset
+
+
+def _parse_param(params, name, parse):
+    try:
+        return parse(params[name])
+    except (ValueError, ArithmeticError):
+        raise ValidationError({name: f"Invalid value: {params[name]}"})
+
+
+def _parse_date_param(params, name, end_of_day=False):
+    """Accepts an ISO datetime, or a date meaning the start (or end) of that day."""
+    value = params[name]
+    parsed = _parse_param(params, name, parse_datetime)
+    if parsed is None:
+        day = _parse_param(params, name, parse_date)
+        if day is None:
+            raise ValidationError({name: f"Invalid value: {value}"})
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+class BalanceViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Returns the non-zero balances the authenticated user is part of,
+    read from the materialized Balance table.
+    """
+    serializer_class = BalanceSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        return (
+            Balance.objects
+            .filter(Q(user_a=user) | Q(user_b=user))
+            .exclude(amount=0)
+        )
+
+class HouseholdViewSet(viewsets.ViewSet):
+    """
+    Household-level settle-up, computed from the materialized balances.
+    """
+    @action(detail=True, methods=['get', 'post'], url_path='settle-plan')
+    def settle_plan(self, request, pk=None):
+        """
+        GET: the minimal set of transfers that settles the household.
+        POST: records that plan as settlement Ledger entries.
+        """
+        if not request.user.is_authenticated:
+             return Response({"error": "User must be authenticated"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        if request.user.household_id != pk:
+            return Response({"error": "Not a member of this household"}, status=status.HTTP_403_FORBIDDEN)
+
+        if request.method == 'POST':
+            entries = settle_household(pk, recorded_by=request.user)
+            return Response({
+                "status": "settled",
+                "settlements": LedgerSerializer(entries, many=True).data
+            }, status=status.HTTP_201_CREATED)
+
+        transfers = household_settle_plan(pk)
+        return Response({
+            "household_id": pk,
+            "transfers": [
+                {"from_user": str(debtor_id), "to_user": str(creditor_id), "amount": str(amount)}
+                for debtor_id, creditor_id, amount in transfers
+            ]
+        })
@@ -175,3 +175,24 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Background jobs
+# Number of threads used to run queued Splitwise syncs and of processes used
+# for document text extraction (see finance/jobs.py).
+
+SYNC_JOB_WORKERS = int(os.getenv('SYNC_JOB_WORKERS', '2'))
+OCR_MAX_WORKERS = int(os.getenv('OCR_MAX_WORKERS', os.cpu_count() or 1))
+
+# Seconds without a heartbeat after which a running sync job is presumed lost
+# (e.g. to a restart) and marked failed, so the user can start a new one.
+
+SYNC_JOB_TIMEOUT = int(os.getenv('SYNC_JOB_TIMEOUT', 30 * 60))
+
+# Seconds after which a document still marked as processing is presumed lost
+# and marked failed (see finance/jobs.py).
+
+DOCUMENT_EXTRACTION_TIMEOUT = int(os.getenv('DOCUMENT_EXTRACTION_TIMEOUT', 15 * 60))
+
+# Upper bound for the extracted-text dedup cache (see finance/document_cache.py).
+
+DOCUMENT_CACHE_MAX_BYTES = int(os.getenv('DOCUMENT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
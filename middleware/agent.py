@@ -1,53 +1,66 @@
 import os
-import json
-import pandas as pd
+import time
 from sqlalchemy import create_engine
 from langchain_community.utilities import SQLDatabase
 from langchain_community.agent_toolkits import create_sql_agent
 from langchain_groq import ChatGroq
 from langchain.agents.agent_types import AgentType
+from transaction_store import TransactionStore
+from query_cache import QueryCache
+from intent_router import IntentRouter
 
 class FinancialAnalystTool:
-    def __init__(self, json_path="data/transactions.json", model_name="llama3-70b-8192"):
+    def __init__(self, json_path="data/transactions.json", model_name="llama3-70b-8192", db_path=None,
+                 cache=True, semantic_cache=False, fast_path=True,
+                 trace_path=None):
         """
         Initializes the Financial Analyst Agent.
         
         Args:
             json_path (str): Path to the transaction JSON file.
             model_name (str): Groq model to use.
+            db_path (str, optional): On-disk SQLite store reused between instances.
+                Defaults to the JSON path with a .sqlite3 extension.
+            cache (bool): Reuse answers to repeated questions until the data changes.
+            semantic_cache (bool): Also reuse answers to near-duplicate questions.
+            fast_path (bool): Answer common spend questions with direct SQL instead of the agent.
+            trace_path (str, optional): JSONL file to append per-run traces to.
+                Defaults to $AGENT_TRACE_PATH; tracing is off if neither is set.
         """
         self.json_path = json_path
         self.model_name = model_name
-        self.db_uri = "sqlite:///:memory:" # Use RAM for speed (or file path for persistence)
+        self.db_path = db_path or os.path.splitext(json_path)[0] + ".sqlite3"
         self.agent = None
+        self.cache = None
+        self.router = None
+        trace_path = trace_path or os.environ.get("AGENT_TRACE_PATH")
+        self.tracer = None
+        if trace_path:
+            # Imported only when tracing is on, to keep agent start-up light.
+            from tracing import AgentTracer
+            self.tracer = AgentTracer(trace_path)
         
         # 1. Load Data immediately on init
         self._load_data_to_sql()
         
+        if cache:
+            self.cache = QueryCache(self.store, semantic=semantic_cache)
+        if fast_path:
+            self.router = IntentRouter(self.store)
+
         # 2. Initialize the Agent
         self._init_agent()
 
     def _load_data_to_sql(self):
-        """Internal: Loads JSON into in-memory SQLite DB."""
+        """Internal: Syncs the JSON file into the persistent SQLite store (only new/changed rows)."""
         if not os.path.exists(self.json_path):
             raise FileNotFoundError(f"Transaction file not found at: {self.json_path}")
 
-        with open(self.json_path, 'r') as f:
-            data = json.load(f)
-
-        # Handle various JSON structures
-        txns = data.get("transactions", data) if isinstance(data, dict) else data
-        
-        df = pd.DataFrame(txns)
-        
-        # Data Cleaning: Flatten list columns (like 'tags') for SQL
-        if 'tags' in df.columns:
-            df['tags'] = df['tags'].apply(lambda x: ", ".join(x) if isinstance(x, list) else str(x))
+        self.store = TransactionStore(self.db_path)
+        self.store.sync(self.json_path)
 
-        # Create Engine & Push to SQL
-        engine = create_engine(self.db_uri)
-        df.to_sql("transactions", engine, index=False, if_exists="replace")
-        self.db = SQLDatabase(engine)
+        engine = create_engine(self.store.uri)
+        self.db = SQLDatabase(engine, include_tables=["transactions"])
 
     def _init_agent(self):
         """Internal: Configures the LLM and SQL Agent."""
@@ -65,18 +78,48 @@ class FinancialAnalystTool:
             handle_parsing_errors=True
         )
 
-    def run(self, query: str) -> str:
+    def run(self, query: str, use_cache: bool = True) -> str:
         """
         The public API for the system.
         
         Args:
             query (str): The user's natural language question.
+            use_cache (bool): Serve/record the answer through the query cache.
         Returns:
             str: The agent's analysis result.
         """
         if not self.agent:
             return "Error: Agent not initialized."
 
+        if self.tracer:
+            self.tracer.begin(query)
+        try:
+            answer = self._answer(query, use_cache)
+        except Exception as e:
+            if self.tracer:
+                self.tracer.end(error=e)
+            return f"Analysis Failed: {str(e)}"
+        if self.tracer:
+            self.tracer.end()
+        return answer
+
+    def _answer(self, query, use_cache):
+        """Internal: Tries the fast path and the cache before running the SQL agent."""
+        if self.router:
+            started = time.perf_counter()
+            answer = self.router.answer(query)
+            if answer is not None:
+                self._trace_step("fast_path", started)
+                return answer
+
+        use_cache = use_cache and self.cache is not None
+        if use_cache:
+            started = time.perf_counter()
+            cached = self.cache.get(query)
+            if cached is not None:
+                self._trace_step("cache", started)
+                return cached
+
         # Pre-prompt injection to handle financial context (negative numbers)
         contextualized_query = (
             f"{query} "
@@ -84,11 +127,21 @@ class FinancialAnalystTool:
             "Positive values represent INCOME. When asked for 'spend' or 'cost', sum the absolute values of negative amounts.)"
         )
         
-        try:
-            response = self.agent.invoke(contextualized_query)
-            return response['output']
-        except Exception as e:
-            return f"Analysis Failed: {str(e)}"
+        started = time.perf_counter()
+        config = {"callbacks": [self.tracer]} if self.tracer else None
+        response = self.agent.invoke(contextualized_query, config=config)
+
+        if use_cache:
+            self.cache.set(query, response['output'], time.perf_counter() - started)
+        return response['output']
+
+    def _trace_step(self, step_type, started):
+        if self.tracer:
+            self.tracer.add_step(step_type, time.perf_counter() - started)
+
+    def cache_stats(self):
+        """Hit rate and seconds saved by the query cache (None if caching is disabled)."""
+        return self.cache.stats() if self.cache else None
 
 # Optional: Standalone test
 if __name__ == "__main__":
@@ -0,0 +1,170 @@
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+
+# Segment records: 8-byte header (payload length, CRC32 of the payload) followed by the payload,
+# which is zlib-compressed compact JSON.
+RECORD_HEADER = struct.Struct("<II")
+SEGMENT_MAGIC = b"IZSEG001"
+
+
+class JsonDirectoryWriter:
+    """
+    The original layout: one directory per user with indented JSON files
+    (data/<user_id>/analysis_summary.json, ...). Each file is written to a
+    temporary name and renamed into place, so readers never see half a file.
+    """
+    def __init__(self, root="data"):
+        self.root = root
+
+    def location(self, user_id):
+        return os.path.join(self.root, user_id)
+
+    def write(self, user_id, name, data):
+        directory = self.location(user_id)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, os.path.join(directory, name))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def close(self):
+        pass
+
+
+class SegmentWriter:
+    """
+    Compact artifact store: records are appended to one segment file per
+    day and writer (root/<YYYY-MM-DD>/<pid>-<id>.seg), so concurrent worker
+    processes never share a file. Each record is also appended to a .idx
+    sidecar as "user_id, name, offset, length, crc, written_at". The index
+    line is written only after the record is flushed, which makes a record
+    visible to SegmentReader all at once or not at all.
+    """
+    def __init__(self, root=os.path.join("data", "segments"), fsync=False):
+        """
+        Args:
+            root (str): Directory holding the per-day segment folders.
+            fsync (bool): fsync the segment before indexing each record (durable, but slower).
+        """
+        self.root = root
+        self.fsync = fsync
+        self.writer_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._day = None
+        self._segment = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    def location(self, user_id):
+        return self.root
+
+    def _open(self, day):
+        self.close()
+        directory = os.path.join(self.root, day)
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.writer_id)
+        self._segment = open(base + ".seg", "ab")
+        if self._segment.tell() == 0:
+            self._segment.write(SEGMENT_MAGIC)
+        self._index = open(base + ".idx", "a")
+        self._day = day
+
+    def write(self, user_id, name, data):
+        payload = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        crc = zlib.crc32(payload)
+        day = datetime.now().strftime("%Y-%m-%d")
+        with self._lock:
+            if day != self._day:
+                self._open(day)
+            offset = self._segment.tell() + RECORD_HEADER.size
+            self._segment.write(RECORD_HEADER.pack(len(payload), crc))
+            self._segment.write(payload)
+            self._segment.flush()
+            if self.fsync:
+                os.fsync(self._segment.fileno())
+            self._index.write(json.dumps([user_id, name, offset, len(payload), crc, time.time()]) + "\n")
+            self._index.flush()
+
+    def close(self):
+        for f in (self._segment, self._index):
+            if f:
+                f.close()
+        self._segment = self._index = self._day = None
+
+
+class SegmentReader:
+    """
+    Looks up artifacts written by SegmentWriter. All .idx sidecars are read
+    into a dict keyed by (user_id, name) on construction (or refresh()); a
+    lookup is then one dict access plus a slice of the memory-mapped segment.
+    When the same artifact was written more than once, the newest wins.
+    """
+    def __init__(self, root=os.path.join("data", "segments")):
+        self.root = root
+        self._maps = {}
+        self.refresh()
+
+    def refresh(self):
+        index = {}
+        for index_path in sorted(glob.glob(os.path.join(self.root, "*", "*.idx"))):
+            segment_path = index_path[:-len(".idx")] + ".seg"
+            with open(index_path, "r") as f:
+                for line in f:
+                    try:
+                        user_id, name, offset, length, crc, written_at = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line from an interrupted writer.
+                    known = index.get((user_id, name))
+                    if known is None or written_at >= known[4]:
+                        index[(user_id, name)] = (segment_path, offset, length, crc, written_at)
+        self._index = index
+
+    def _map(self, segment_path):
+        mapped = self._maps.get(segment_path)
+        if mapped is None or mapped.size() < os.path.getsize(segment_path):
+            # Segments only grow; remap when the writer has appended past the mapped end.
+            if mapped is not None:
+                mapped.close()
+            with open(segment_path, "rb") as f:
+                mapped = self._maps[segment_path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return mapped
+
+    def get(self, user_id, name="analysis_summary.json"):
+        """Returns the stored artifact, or None if the user has none under that name."""
+        entry = self._index.get((user_id, name))
+        if entry is None:
+            return None
+        segment_path, offset, length, crc, _ = entry
+        payload = self._map(segment_path)[offset:offset + length]
+        if zlib.crc32(payload) != crc:
+            raise ValueError(f"Corrupt record for {user_id}/{name} in {segment_path} at offset {offset}")
+        return json.loads(zlib.decompress(payload))
+
+    def users(self):
+        return sorted({user_id for user_id, _ in self._index})
+
+    def close(self):
+        for mapped in self._maps.values():
+            mapped.close()
+        self._maps = {}
+
+
+def make_writer(kind="json", root=None):
+    """Builds an artifact writer by name: "json" (directory per user) or "segments"."""
+    if kind == "json":
+        return JsonDirectoryWriter(root or "data")
+    if kind == "segments":
+        return SegmentWriter(root or os.path.join("data", "segments"))
+    raise ValueError(f"Unknown artifact format: {kind}")
@@ -0,0 +1,154 @@
+import argparse
+import contextlib
+import json
+import math
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from artifacts import make_writer
+from pipeline import FinancialPipeline
+
+_writers = {}
+
+
+def run_shard(user_ids, scenario="CRITICAL", quiet=True, artifacts="json"):
+    """
+    Runs the pipeline for each user in `user_ids` inside one worker process.
+    A failing user does not stop the rest of the shard.
+
+    Returns:
+        list: One entry per user with "user_id", "status", "seconds" and
+            either "report" (the analysis summary) or "error".
+    """
+    entries = []
+    # One writer per worker process, reused by every shard it runs (segments stay few and large).
+    writer = _writers.get(artifacts) or _writers.setdefault(artifacts, make_writer(artifacts))
+    with open(os.devnull, "w") as devnull, \
+            (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+        for user_id in user_ids:
+            started = time.perf_counter()
+            entry = {"user_id": user_id}
+            try:
+                entry["report"] = FinancialPipeline(user_id, writer=writer).run_pipeline(scenario=scenario)
+                entry["status"] = "ok"
+            except Exception as e:
+                entry["status"] = "error"
+                entry["error"] = f"{type(e).__name__}: {e}"
+            entry["seconds"] = round(time.perf_counter() - started, 4)
+            entries.append(entry)
+    return entries
+
+
+def run_batch(user_ids, workers=None, scenario="CRITICAL", max_retries=2, shard_size=None,
+              results_path=None, quiet=True, artifacts="json"):
+    """
+    Runs FinancialPipeline for many users, sharded over a process pool.
+    Users that fail are retried in a fresh pool up to `max_retries` times.
+
+    Args:
+        user_ids (list): Users to process.
+        workers (int, optional): Worker processes. Defaults to the CPU count.
+        scenario (str): Scenario passed to run_pipeline for every user.
+        max_retries (int): Extra rounds for users that failed.
+        shard_size (int, optional): Users per task. Defaults to about four shards per worker, at most 100 users.
+        results_path (str, optional): JSONL file that receives {"user_id", "report"} lines as users finish.
+            If omitted, the reports are returned in the summary instead.
+        quiet (bool): Silence the per-user pipeline output.
+        artifacts (str): Artifact format, "json" (directory per user) or "segments" (see artifacts.py).
+
+    Returns:
+        dict: Run summary with counts, users/sec and the users that still failed.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    pending = list(dict.fromkeys(user_ids))
+    reports = {}
+    errors = {}
+    processed = 0
+    retried = 0
+
+    results_file = open(results_path, "a") if results_path else None
+    started = time.perf_counter()
+    try:
+        for attempt in range(max_retries + 1):
+            if not pending:
+                break
+            if attempt:
+                retried += len(pending)
+                print(f"[*] Batch: retrying {len(pending)} failed user(s) (attempt {attempt + 1}).")
+
+            size = shard_size or max(1, min(100, math.ceil(len(pending) / (workers * 4))))
+            shards = [pending[i:i + size] for i in range(0, len(pending), size)]
+            failed = []
+            with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+                futures = {pool.submit(run_shard, shard, scenario, quiet, artifacts): shard for shard in shards}
+                for future in as_completed(futures):
+                    try:
+                        entries = future.result()
+                    except Exception as e:
+                        # The worker itself died (e.g. BrokenProcessPool); retry the whole shard.
+                        entries = [{"user_id": user_id, "status": "error", "error": f"{type(e).__name__}: {e}"}
+                                   for user_id in futures[future]]
+
+                    for entry in entries:
+                        if entry["status"] != "ok":
+                            failed.append(entry["user_id"])
+                            errors[entry["user_id"]] = entry["error"]
+                            continue
+                        processed += 1
+                        errors.pop(entry["user_id"], None)
+                        if results_file:
+                            results_file.write(json.dumps({"user_id": entry["user_id"], "report": entry["report"]}) + "\n")
+                        else:
+                            reports[entry["user_id"]] = entry["report"]
+                    if results_file:
+                        results_file.flush()
+            pending = failed
+    finally:
+        if results_file:
+            results_file.close()
+    elapsed = time.perf_counter() - started
+
+    summary = {
+        "users": processed + len(pending),
+        "processed": processed,
+        "failed": len(pending),
+        "retried": retried,
+        "workers": workers,
+        "elapsed_seconds": round(elapsed, 3),
+        "users_per_second": round(processed / elapsed, 3) if elapsed > 0 else 0.0,
+        "failed_users": {user_id: errors[user_id] for user_id in pending},
+    }
+    if not results_path:
+        summary["reports"] = reports
+    print(
+        f"[*] Batch complete: {processed} user(s) processed, {len(pending)} failed, "
+        f"{summary['users_per_second']} users/sec on {workers} worker(s)"
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run FinancialPipeline for many users on a process pool.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--users-file", help="File with one user_id per line.")
+    source.add_argument("--count", type=int, help="Generate this many random AGT-XXXX user ids.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--scenario", default="CRITICAL", choices=["CRITICAL", "STABLE"])
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--shard-size", type=int, default=None)
+    parser.add_argument("--results", help="JSONL file for the gathered analysis summaries.")
+    parser.add_argument("--artifacts", default="json", choices=["json", "segments"])
+    args = parser.parse_args()
+
+    if args.users_file:
+        with open(args.users_file, "r") as f:
+            users = [line.strip() for line in f if line.strip()]
+    else:
+        users = [f"AGT-{uuid.uuid4().hex[:8].upper()}" for _ in range(args.count)]
+
+    summary = run_batch(users, workers=args.workers, scenario=args.scenario, max_retries=args.retries,
+                        shard_size=args.shard_size, results_path=args.results, artifacts=args.artifacts)
+    summary.pop("reports", None)
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from stats import percentile
+from vision_model import IMAGE_MIME_TYPES, VisionModel
+
+SUPPORTED_EXTENSIONS = set(IMAGE_MIME_TYPES) | {".pdf"}
+DEFAULT_PROMPT = "Analyze the content of this document/image."
+
+
+def find_files(input_dir):
+    """Yields paths (relative to `input_dir`) of every supported file under it, in sorted order."""
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                yield os.path.relpath(os.path.join(root, name), input_dir)
+
+
+def load_manifest(manifest_path):
+    """Returns the set of files already processed successfully according to the manifest."""
+    done = set()
+    if not os.path.exists(manifest_path):
+        return done
+    with open(manifest_path, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written last line of an interrupted run.
+            if entry.get("status") == "ok":
+                done.add(entry["file"])
+    return done
+
+
+def process_directory(input_dir, output_dir, manifest_path=None, workers=4, prompt=DEFAULT_PROMPT, vision=None):
+    """
+    Runs VisionModel.process_file over every supported file in `input_dir`
+    on a pool of `workers` threads. Each result is written to `output_dir`
+    (mirroring the input layout, with a .json suffix) and recorded in a JSONL
+    manifest as soon as it finishes. Files already marked ok in the manifest
+    are skipped, so an interrupted run can be resumed.
+
+    Args:
+        input_dir (str): Directory to scan recursively.
+        output_dir (str): Directory for per-file JSON results.
+        manifest_path (str, optional): JSONL manifest. Defaults to <output_dir>/manifest.jsonl.
+        workers (int): Files processed in parallel.
+        prompt (str): Analysis prompt.
+        vision (VisionModel, optional): Shared model instance. Created if omitted.
+
+    Returns:
+        dict: Run summary with counts, files/sec and p50/p95 per-file latency.
+    """
+    manifest_path = manifest_path or os.path.join(output_dir, "manifest.jsonl")
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+    vision = vision or VisionModel()
+
+    done = load_manifest(manifest_path)
+    pending = [path for path in find_files(input_dir) if path not in done]
+    print(f"[*] Batch: {len(pending)} file(s) to process, {len(done)} already in manifest.")
+
+    def run_one(rel_path):
+        started = time.perf_counter()
+        output_path = os.path.join(output_dir, rel_path + ".json")
+        entry = {"file": rel_path, "output": output_path}
+        try:
+            results = vision.process_file(os.path.join(input_dir, rel_path), output_path, prompt=prompt)
+            failed_pages = [page for page in (results or {}).get("analysis", []) if "error" in page]
+            if failed_pages:
+                # Not marked ok, so a resumed run retries the file.
+                entry["status"] = "error"
+                entry["error"] = f"{len(failed_pages)} page(s) failed: {failed_pages[0]['error']}"
+            else:
+                entry["status"] = "ok"
+        except Exception as e:
+            entry["status"] = "error"
+            entry["error"] = str(e)
+        entry["seconds"] = round(time.perf_counter() - started, 4)
+        return entry
+
+    latencies = []
+    failed = 0
+    started = time.perf_counter()
+    with open(manifest_path, "a") as manifest, ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(run_one, path) for path in pending]
+        for future in as_completed(futures):
+            entry = future.result()
+            manifest.write(json.dumps(entry) + "\n")
+            manifest.flush()
+            latencies.append(entry["seconds"])
+            if entry["status"] != "ok":
+                failed += 1
+    elapsed = time.perf_counter() - started
+
+    summary = {
+        "processed": len(latencies),
+        "failed": failed,
+        "skipped": len(done),
+        "elapsed_seconds": round(elapsed, 3),
+        "files_per_second": round(len(latencies) / elapsed, 3) if elapsed > 0 else 0.0,
+        "p50_seconds": percentile(latencies, 50),
+        "p95_seconds": percentile(latencies, 95),
+    }
+    print(
+        f"[*] Batch complete: {summary['processed']} processed ({failed} failed), "
+        f"{summary['files_per_second']} files/sec, "
+        f"p50 {summary['p50_seconds']:.3f}s, p95 {summary['p95_seconds']:.3f}s"
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run vision analysis over a directory of receipts/statements.")
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--manifest", help="JSONL manifest path (default: <output_dir>/manifest.jsonl)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT)
+    args = parser.parse_args()
+
+    process_directory(args.input_dir, args.output_dir, manifest_path=args.manifest,
+                      workers=args.workers, prompt=args.prompt)
@@ -0,0 +1,87 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from bulk_generator import BulkTransactionGenerator
+from pipeline import FinancialAnalyzer, RandomFinancialGenerator
+from vectorized_analyzer import VectorizedFinancialAnalyzer
+
+COLUMNS = ("merchant", "amount", "category", "tags")
+
+
+def make_batch(count, seed=0):
+    """
+    Columnar batch of `count` BulkTransactionGenerator rows (CRITICAL
+    weights), keeping only the columns the analyzers read. Generated in
+    chunks so ids and timestamps never exist for the whole batch at once.
+    """
+    batches = [{column: batch[column] for column in COLUMNS}
+               for batch in BulkTransactionGenerator(seed=seed).iter_batches(count)]
+    if len(batches) == 1:
+        return batches[0]
+    return {
+        "merchant": np.concatenate([batch["merchant"] for batch in batches]),
+        "amount": np.concatenate([batch["amount"] for batch in batches]),
+        "category": _concat_categorical([batch["category"] for batch in batches]),
+        "tags": _concat_categorical([batch["tags"] for batch in batches]),
+    }
+
+
+def _concat_categorical(parts):
+    # Every batch from one generator shares the same categories, so the codes can be joined directly.
+    return pd.Categorical.from_codes(np.concatenate([part.codes for part in parts]), categories=parts[0].categories)
+
+
+def records_from_batch(batch):
+    """The same batch as the list of dicts FinancialAnalyzer expects."""
+    tag_lists = [list(tag_set) for tag_set in batch["tags"].categories]
+    return [
+        {"merchant": m, "amount": a, "category": c, "tags": list(tag_lists[t])}
+        for m, a, c, t in zip(batch["merchant"], batch["amount"].tolist(),
+                              np.asarray(batch["category"], dtype=object), batch["tags"].codes)
+    ]
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def comparable(report):
+    report = dict(report, meta=dict(report["meta"]))
+    report["meta"].pop("analyzed_at")
+    return json.dumps(report, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare FinancialAnalyzer with VectorizedFinancialAnalyzer.")
+    parser.add_argument("--sizes", default="10000,1000000,10000000", help="Comma-separated transaction counts.")
+    parser.add_argument("--max-dict-rows", type=int, default=1000000,
+                        help="Largest size to also build as a list of dicts (about 400 bytes per row).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    profile = RandomFinancialGenerator().generate_profile("AGT-BENCH")
+    loop, vectorized = FinancialAnalyzer(), VectorizedFinancialAnalyzer()
+
+    print(f"{'rows':>12}{'loop s':>10}{'vec(dicts) s':>14}{'vec(cols) s':>13}{'speedup':>10}  match")
+    for size in (int(s) for s in args.sizes.split(",")):
+        batch = make_batch(size, args.seed)
+        columnar_report, columnar_seconds = timed(vectorized.analyze, profile, batch)
+
+        loop_seconds = dict_seconds = None
+        match = "n/a"
+        if size <= args.max_dict_rows:
+            records = records_from_batch(batch)
+            loop_report, loop_seconds = timed(loop.analyze, profile, records)
+            dict_report, dict_seconds = timed(vectorized.analyze, profile, records)
+            match = comparable(loop_report) == comparable(dict_report) == comparable(columnar_report)
+            del records
+
+        fmt = lambda value, width: f"{value:>{width}.3f}" if value is not None else f"{'skipped':>{width}}"
+        speedup = f"{loop_seconds / columnar_seconds:>9.1f}x" if loop_seconds else f"{'-':>10}"
+        print(f"{size:>12}{fmt(loop_seconds, 10)}{fmt(dict_seconds, 14)}{fmt(columnar_seconds, 13)}{speedup}  {match}")
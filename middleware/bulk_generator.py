@@ -0,0 +1,314 @@
+import argparse
+import os
+import sys
+import time
+import uuid
+import zlib
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from pipeline import RandomFinancialGenerator
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+TAG_SETS = [("VERIFIED",), ("VERIFIED", "RECURRING"), ("VERIFIED", "HIGH_VALUE"), ("VERIFIED", "SURGE_DETECTED")]
+# Relative transaction volume per hour of day: quiet nights, lunch and evening peaks.
+HOURLY_WEIGHTS = np.array([1, 0.5, 0.3, 0.2, 0.2, 0.4, 1, 2, 3, 3, 3, 4,
+                           6, 5, 4, 3, 3, 4, 6, 8, 8, 6, 4, 2], dtype=np.float64)
+WEEKEND_WEIGHT = 1.25
+# Ids are (row index * odd constant) mod 2**40, a bijection, so they look random but never collide.
+ID_BITS = 40
+ID_MULTIPLIER = 0x9E3779B97F
+
+
+class BulkTransactionGenerator:
+    """
+    Seeded, vectorized counterpart of RandomFinancialGenerator.generate_transactions
+    for load and benchmark fixtures. Uses the same categories, merchants,
+    scenario weights, amount ranges and tag rules, but draws whole columns
+    at once with a NumPy Generator and spreads timestamps over [start, end)
+    with weekend and time-of-day weighting.
+
+    Batches are dicts of columns ("id", "timestamp", "merchant", "amount",
+    "category", "tags"), with "category" and "tags" as pandas Categoricals,
+    which VectorizedFinancialAnalyzer accepts directly. They come out in
+    date order. Output is identical for the same seed, count and batch_size.
+    """
+    def __init__(self, seed=0, scenario="CRITICAL", start="2024-01-01", end="2025-01-01", batch_size=250000):
+        """
+        Args:
+            seed (int): Seed for the NumPy Generator.
+            scenario (str): "CRITICAL" or "STABLE" category weighting.
+            start (str): First day (inclusive) of the timestamp range.
+            end (str): Last day (exclusive) of the timestamp range.
+            batch_size (int): Rows per yielded batch.
+        """
+        reference = RandomFinancialGenerator()
+        self.seed = seed
+        self.batch_size = max(1, batch_size)
+        self.start = np.datetime64(start, "D")
+        self.end = np.datetime64(end, "D")
+        if self.end <= self.start:
+            raise ValueError("end must be after start")
+
+        self.categories = list(reference.merchants)
+        weights = np.array(reference.SCENARIO_WEIGHTS["CRITICAL" if scenario == "CRITICAL" else "STABLE"],
+                           dtype=np.float64)
+        self.category_p = weights / weights.sum()
+        ranges = [reference.AMOUNT_RANGES.get(c, reference.DEFAULT_AMOUNT_RANGE) for c in self.categories]
+        self.low = np.array([low for low, _ in ranges], dtype=np.float64)
+        self.high = np.array([high for _, high in ranges], dtype=np.float64)
+
+        # All merchants in one flat array; a category's merchants are a contiguous slice of it.
+        self.merchants = np.array([m for c in self.categories for m in reference.merchants[c]], dtype=object)
+        counts = np.array([len(reference.merchants[c]) for c in self.categories])
+        self.merchant_offset = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        self.merchant_count = counts
+
+        tag_sets = np.empty(len(TAG_SETS), dtype=object)
+        tag_sets[:] = TAG_SETS
+        self.tag_categories = pd.Index(tag_sets, dtype=object)
+
+    def iter_batches(self, count):
+        """Yields `count` transactions as columnar batches of up to batch_size rows."""
+        rng = np.random.default_rng(self.seed)
+
+        # Spread rows over days up front so that consecutive batches cover consecutive dates.
+        days = np.arange(self.start, self.end, dtype="datetime64[D]")
+        weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday; 0 = Monday.
+        day_p = np.where(weekday >= 5, WEEKEND_WEIGHT, 1.0)
+        rows_per_day = rng.multinomial(count, day_p / day_p.sum())
+        day_of_row = np.repeat(np.arange(len(days), dtype=np.int32), rows_per_day)
+        id_offset = int(rng.integers(1 << ID_BITS))
+
+        for first in range(0, count, self.batch_size):
+            yield self._batch(rng, day_of_row[first:first + self.batch_size], id_offset + first)
+
+    def _batch(self, rng, day_of_row, first_id):
+        n = len(day_of_row)
+        codes = rng.choice(len(self.categories), size=n, p=self.category_p).astype(np.int8)
+        amounts = np.round(rng.uniform(self.low[codes], self.high[codes]), 2)
+        pick = (rng.random(n) * self.merchant_count[codes]).astype(np.int64)
+        merchants = self.merchants[self.merchant_offset[codes] + pick]
+
+        seconds = (
+            day_of_row.astype(np.int64) * 86400
+            + rng.choice(24, size=n, p=HOURLY_WEIGHTS / HOURLY_WEIGHTS.sum()) * 3600
+            + rng.integers(3600, size=n)
+        )
+        order = np.argsort(seconds, kind="stable")
+        codes, amounts, merchants, seconds = codes[order], amounts[order], merchants[order], seconds[order]
+        timestamps = np.datetime_as_string(self.start.astype("datetime64[s]") + seconds, unit="s")
+
+        # Same tag rules as RandomFinancialGenerator.generate_transactions.
+        tag_codes = np.zeros(n, dtype=np.int8)
+        tag_codes[codes == self.categories.index("Subscription")] = 1
+        tag_codes[(codes == self.categories.index("Food")) & (amounts > 2000)] = 2
+        tag_codes[(codes == self.categories.index("Transport")) & (amounts > 800)] = 3
+
+        return {
+            "id": _transaction_ids(first_id, n),
+            "timestamp": timestamps,
+            "merchant": merchants,
+            "amount": -amounts,  # Outflow is negative
+            "category": pd.Categorical.from_codes(codes, categories=self.categories),
+            "tags": pd.Categorical.from_codes(tag_codes, categories=self.tag_categories),
+        }
+
+
+def _transaction_ids(first, count):
+    """'TRX-' followed by 10 upper-case hex digits, unique across the 2**40 consecutive indices."""
+    index = np.arange(first, first + count, dtype=np.uint64)
+    value = (index * np.uint64(ID_MULTIPLIER)) & np.uint64((1 << ID_BITS) - 1)
+    shifts = np.arange(ID_BITS - 4, -1, -4, dtype=np.uint64)
+    digits = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)[(value[:, None] >> shifts) & np.uint64(15)]
+    prefix = np.broadcast_to(np.frombuffer(b"TRX-", dtype=np.uint8), (count, 4))
+    return np.hstack([prefix, digits]).view(f"S{4 + ID_BITS // 4}").ravel().astype(f"U{4 + ID_BITS // 4}")
+
+
+def to_frame(batch):
+    """Batch -> DataFrame shaped like generate_transactions output (tags as lists)."""
+    tags = batch["tags"]
+    tag_lists = np.empty(len(tags.categories), dtype=object)
+    tag_lists[:] = [list(tag_set) for tag_set in tags.categories]
+    return pd.DataFrame({
+        "id": batch["id"],
+        "timestamp": batch["timestamp"],
+        "merchant": batch["merchant"],
+        "amount": batch["amount"],
+        "category": np.asarray(batch["category"], dtype=object),
+        "tags": tag_lists[tags.codes],
+    })
+
+
+def write_jsonl(batches, path):
+    """Streams batches to a JSON Lines file (readable by TransactionStore). Returns the row count."""
+    rows = 0
+    with open(path, "w") as f:
+        for batch in batches:
+            to_frame(batch).to_json(f, orient="records", lines=True, force_ascii=False)
+            rows += len(batch["id"])
+    return rows
+
+
+def write_parquet(batches, path):
+    """Streams batches to a Parquet file, one row group per batch. Needs pyarrow."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError("Parquet output requires pyarrow. Install it with 'pip install pyarrow'.") from exc
+
+    rows = 0
+    writer = None
+    try:
+        for batch in batches:
+            table = pa.Table.from_pandas(to_frame(batch), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def load_into_django(batches, household_id="loadtest", members=4, seed=0, replace=True, backend_dir=BACKEND_DIR):
+    """
+    Inserts batches into the backend's Transaction and Ledger tables with
+    bulk_create. Each transaction is paid by one of `members` synthetic users
+    in `household_id` and split equally; the other members owe the payer
+    their share. Balances are updated with apply_ledger_entries, as the
+    Splitwise import does. Uses DJANGO_SETTINGS_MODULE if set, otherwise
+    the backend's settings.
+
+    Transaction ids are derived from `seed` and `household_id`, so the same
+    call always produces the same rows. With `replace` (the default) the
+    household's earlier transactions, ledger rows and balances are removed
+    first, so a load can be repeated; pass replace=False to add to them
+    with a different seed.
+
+    Returns:
+        int: Number of transactions inserted.
+    """
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "izaas_backend.settings")
+    import django
+    django.setup()
+
+    from django.db import transaction
+    from finance.balances import apply_ledger_entries
+    from finance.models import Category, Ledger, Transaction, User
+
+    usernames = [f"{household_id}-{i}@loadtest.invalid" for i in range(max(1, members))]
+    existing = set(User.objects.filter(username__in=usernames).values_list("username", flat=True))
+    new_users = []
+    for username in usernames:
+        if username not in existing:
+            user = User(username=username, email=username, household_id=household_id)
+            user.set_unusable_password()
+            new_users.append(user)
+    User.objects.bulk_create(new_users)
+    users_by_name = User.objects.in_bulk(usernames, field_name="username")
+    users = [users_by_name[username] for username in usernames]
+
+    if replace:
+        _clear_household(household_id, users)
+
+    categories = {}
+    rng = np.random.default_rng([seed, zlib.crc32(household_id.encode("utf-8"))])
+    inserted = 0
+    for batch in batches:
+        n = len(batch["id"])
+        payers = rng.integers(len(users), size=n).tolist()
+        ids = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+        dates = pd.to_datetime(batch["timestamp"]).tz_localize(dt_timezone.utc).to_pydatetime()
+        category_names = np.asarray(batch["category"], dtype=object)
+
+        transactions, entries = [], []
+        for i, (merchant, amount, category_name) in enumerate(
+                zip(batch["merchant"], batch["amount"].tolist(), category_names)):
+            if category_name not in categories:
+                categories[category_name] = Category.objects.get_or_create(name=category_name)[0]
+            total = Decimal(f"{-amount:.2f}")
+            payer = users[payers[i]]
+            txn = Transaction(
+                id=uuid.UUID(bytes=ids[i].tobytes(), version=4),
+                description=merchant,
+                total_amount=total,
+                payer=payer,
+                category=categories[category_name],
+                date=dates[i],
+            )
+            transactions.append(txn)
+            share = (total / len(users)).quantize(Decimal("0.01"))
+            for member in users:
+                if member is not payer and share:
+                    entries.append(Ledger(transaction=txn, from_user=member, to_user=payer, amount=share,
+                                          household_id=household_id))
+
+        with transaction.atomic():
+            Transaction.objects.bulk_create(transactions, batch_size=2000)
+            Ledger.objects.bulk_create(entries, batch_size=2000)
+            apply_ledger_entries(entries)
+        inserted += n
+    return inserted
+
+
+
+def _clear_household(household_id, users):
+    """Deletes the synthetic household's transactions, ledger rows and balances."""
+    from django.db import connection, transaction
+    from django.db.models import Q
+    from finance.models import Balance, Ledger, Transaction
+
+    # Plain DELETEs: a queryset delete would load every Ledger row and reverse it
+    # into Balance one post_delete signal at a time. The household's balances
+    # are dropped wholesale instead.
+    doomed = [
+        Ledger.objects.filter(Q(household_id=household_id) | Q(transaction__payer__in=users)),
+        Transaction.objects.filter(payer__in=users),
+    ]
+    with transaction.atomic(), connection.cursor() as cursor:
+        for queryset in doomed:
+            table = queryset.model._meta.db_table
+            sql, params = queryset.values("pk").query.sql_with_params()
+            cursor.execute(f"DELETE FROM {table} WHERE id IN ({sql})", params)
+        Balance.objects.filter(household_id=household_id).delete()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic transactions in bulk.")
+    parser.add_argument("count", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scenario", default="CRITICAL", choices=["CRITICAL", "STABLE"])
+    parser.add_argument("--start", default="2024-01-01")
+    parser.add_argument("--end", default="2025-01-01")
+    parser.add_argument("--batch-size", type=int, default=250000)
+    sink = parser.add_mutually_exclusive_group(required=True)
+    sink.add_argument("--jsonl", help="Write JSON Lines to this path.")
+    sink.add_argument("--parquet", help="Write Parquet to this path (needs pyarrow).")
+    sink.add_argument("--django", action="store_true", help="Insert into the backend Transaction/Ledger tables.")
+    parser.add_argument("--household", default="loadtest", help="Household for --django rows.")
+    parser.add_argument("--members", type=int, default=4, help="Household size for --django rows.")
+    parser.add_argument("--append", action="store_true",
+                        help="Keep the household's earlier --django rows instead of replacing them (use a new --seed).")
+    args = parser.parse_args()
+
+    generator = BulkTransactionGenerator(seed=args.seed, scenario=args.scenario, start=args.start,
+                                         end=args.end, batch_size=args.batch_size)
+    batches = generator.iter_batches(args.count)
+    started = time.perf_counter()
+    if args.jsonl:
+        rows = write_jsonl(batches, args.jsonl)
+    elif args.parquet:
+        rows = write_parquet(batches, args.parquet)
+    else:
+        rows = load_into_django(batches, household_id=args.household, members=args.members, seed=args.seed,
+                                replace=not args.append)
+    elapsed = time.perf_counter() - started
+    print(f"[*] Generated {rows} transactions in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/sec)")
@@ -0,0 +1,81 @@
+import base64
+import io
+import os
+
+from PIL import Image, ImageChops, ImageOps
+
+
+def preprocess_image(image_path, max_long_edge=1600, grayscale=True, autocrop=True, jpeg_quality=80,
+                     original_mime_type="image/jpeg"):
+    """
+    Shrinks a photo before it is sent to the vision model: applies the EXIF
+    rotation, crops uniform borders, downscales to `max_long_edge`, converts
+    to grayscale and re-encodes as JPEG. If that does not make the file
+    smaller, the original bytes are sent instead.
+
+    Args:
+        image_path (str): Path to the image file.
+        max_long_edge (int): Longest side in pixels after downscaling.
+        grayscale (bool): Convert to single-channel grayscale.
+        autocrop (bool): Remove borders that match the corner colour.
+        jpeg_quality (int): JPEG quality (1-100) for the re-encoded image.
+        original_mime_type (str): MIME type to report if the original bytes are kept.
+
+    Returns:
+        tuple: (base64 string, MIME type, stats dict with original/final bytes and size).
+    """
+    original_bytes = os.path.getsize(image_path)
+
+    with Image.open(image_path) as img:
+        original_size = img.size
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("L") if grayscale else img.convert("RGB")
+
+        if autocrop:
+            img = _crop_borders(img)
+
+        img.thumbnail((max_long_edge, max_long_edge), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=jpeg_quality, optimize=True)
+        final_size = img.size
+
+    encoded = buffer.getvalue()
+    mime_type = "image/jpeg"
+    if len(encoded) >= original_bytes:
+        with open(image_path, "rb") as f:
+            encoded = f.read()
+        mime_type = original_mime_type
+        final_size = original_size
+
+    stats = {
+        "original_bytes": original_bytes,
+        "final_bytes": len(encoded),
+        "bytes_saved": original_bytes - len(encoded),
+        "original_size": list(original_size),
+        "final_size": list(final_size),
+    }
+    return base64.b64encode(encoded).decode('utf-8'), mime_type, stats
+
+
+def _crop_borders(img, threshold=24, margin=8):
+    """Crops edges whose pixels are within `threshold` of the top-left corner colour."""
+    background = Image.new(img.mode, img.size, img.getpixel((0, 0)))
+    diff = ImageChops.difference(img, background)
+    if diff.mode != "L":
+        diff = diff.convert("L")
+    bbox = diff.point(lambda p: 255 if p > threshold else 0).getbbox()
+    if not bbox:
+        return img
+
+    left, top, right, bottom = bbox
+    cropped = (
+        max(0, left - margin),
+        max(0, top - margin),
+        min(img.width, right + margin),
+        min(img.height, bottom + margin),
+    )
+    # Ignore crops that would throw away almost everything; the corner was not background.
+    if (cropped[2] - cropped[0]) * (cropped[3] - cropped[1]) < 0.1 * img.width * img.height:
+        return img
+    return img.crop(cropped)
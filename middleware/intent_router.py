@@ -0,0 +1,251 @@
+import calendar
+import re
+from datetime import date, timedelta
+
+# Phrases the templates cannot express faithfully; any of these sends the question to the LLM agent.
+UNSUPPORTED = re.compile(
+    r"\b(average|avg|mean|median|how many|count|compare|vs|versus|than|percent|ratio|income|earn\w*|salary|"
+    r"refund\w*|received|except|excluding|without|not|week\w*|yesterday|today|since|between|before|after|"
+    r"daily|per day|each day|largest|biggest|smallest|cheapest|expensive|why|should|predict\w*|forecast)\b|%"
+)
+SPEND = re.compile(r"\b(spend|spent|spending|spends|cost|costs|paid|pay|paying|expense|expenses|outflow)\b")
+TOP_N = re.compile(r"\btop\s*(\d+)?\s*(merchants|vendors|places|shops|payees)\b")
+MONTHLY = re.compile(r"\b(month[\s-]+over[\s-]+month|mom|per month|by month|each month|every month|monthly)\b")
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+# Anything that still names a time span once the supported period is removed; the router falls back
+# rather than answer for the wrong span ("for March", "over the summer", "in March and April").
+OTHER_PERIOD = re.compile(
+    r"\b(\d{4}|days?|months?|years?|quarters?|q[1-4]|spring|summer|autumn|fall|winter|monsoon|holidays?|"
+    + "|".join(MONTHS) + r"|sept)\b"
+    r"|\b(and|for|over|through|plus)\s+(the\s+)?(last|past|this|previous|prior|first|whole|entire|same)\b"
+)
+# Words a supported question may contain besides its entity, period and template words. Anything else
+# ("recently", "on Saturday", "on my last ride") changes the meaning, so the question goes to the agent.
+FILLER = frozenset((
+    "a an the i me my we our us you your it is are was were be been do did does have has had how much what "
+    "whats what's where which can could would please tell show give list find get total totals overall amount "
+    "money all so far on at in of for to from by with merchant merchants category categories there"
+).split())
+DEFAULT_TOP_N = 5
+
+
+class IntentRouter:
+    """
+    Answers the common spend questions straight from the transaction store
+    with a single parameterised SQL query, so they skip the LLM agent:
+
+      - spend on a merchant or category ("How much did I spend on Uber in March?")
+      - top N merchants by spend ("top 3 merchants in Food last month")
+      - month-over-month totals ("monthly spend on Swiggy")
+
+    Spend is the sum of absolute values of negative amounts. Merchant and
+    category names are matched against the values actually in the store.
+    `answer()` returns None whenever the question does not fit a template
+    exactly, and the caller should fall back to the agent.
+    """
+    def __init__(self, store):
+        """
+        Args:
+            store (TransactionStore): Store to query; its data version decides when names are reloaded.
+        """
+        self.store = store
+        self._names = None  # (data_version, merchants, categories)
+
+    def _known_names(self):
+        version = self.store.data_version
+        if self._names is None or self._names[0] != version:
+            merchants = [row[0] for row in self.store.conn.execute(
+                "SELECT DISTINCT merchant FROM transactions WHERE merchant IS NOT NULL")]
+            categories = [row[0] for row in self.store.conn.execute(
+                "SELECT DISTINCT category FROM transactions WHERE category IS NOT NULL")]
+            self._names = (version, merchants, categories)
+        return self._names[1], self._names[2]
+
+    def match(self, query, today=None):
+        """
+        Classifies `query`.
+
+        Returns:
+            dict: {"intent", "merchant", "category", "period", "limit"}, or None if no template applies.
+        """
+        text = " ".join(query.lower().split())
+        if UNSUPPORTED.search(text):
+            return None
+
+        period, text = _extract_period(text, today or date.today())
+        if period is False:
+            return None
+
+        merchants, categories = self._known_names()
+        found_merchants, merchant_spans = _find_names(text, merchants)
+        found_categories, category_spans = _find_names(text, categories)
+        if len(found_merchants) + len(found_categories) > 1:
+            return None  # Several entities ("Uber and Ola") are for the agent to combine.
+        if not _only_filler(text, merchant_spans + category_spans):
+            return None
+
+        intent = {
+            "merchant": found_merchants[0] if found_merchants else None,
+            "category": found_categories[0] if found_categories else None,
+            "period": period,
+            "limit": None,
+        }
+
+        top = TOP_N.search(text)
+        if top:
+            if intent["merchant"]:
+                return None
+            limit = int(top.group(1) or DEFAULT_TOP_N)
+            if limit < 1:
+                return None
+            intent.update(intent="top_merchants", limit=limit)
+        elif MONTHLY.search(text):
+            intent["intent"] = "monthly_totals"
+        elif SPEND.search(text) and (intent["merchant"] or intent["category"]):
+            intent["intent"] = "spend_by_merchant" if intent["merchant"] else "spend_by_category"
+        else:
+            return None
+        return intent
+
+    def answer(self, query, today=None):
+        """Returns a formatted answer for `query`, or None if it should go to the agent."""
+        intent = self.match(query, today=today)
+        if intent is None:
+            return None
+
+        conditions, params = ["amount < 0"], []
+        if intent["merchant"]:
+            conditions.append("merchant = ?")
+            params.append(intent["merchant"])
+        if intent["category"]:
+            conditions.append("category = ?")
+            params.append(intent["category"])
+        if intent["period"]:
+            start, end, _ = intent["period"]
+            conditions.append("timestamp >= ? AND timestamp < ?")
+            params.extend([start.isoformat(), end.isoformat()])
+        where = " AND ".join(conditions)
+
+        subject = intent["merchant"] or intent["category"]
+        scope = (f" on {subject}" if subject else "") + (f" {intent['period'][2]}" if intent["period"] else "")
+
+        if intent["intent"] == "top_merchants":
+            rows = self.store.conn.execute(
+                f"SELECT merchant, SUM(-amount) AS spent FROM transactions WHERE {where}"
+                " GROUP BY merchant ORDER BY spent DESC LIMIT ?",
+                params + [intent["limit"]],
+            ).fetchall()
+            if not rows:
+                return f"No spending found{scope}."
+            lines = [f"{rank}. {merchant}: ₹{spent:,.2f}" for rank, (merchant, spent) in enumerate(rows, 1)]
+            in_category = f" in {intent['category']}" if intent["category"] else ""
+            period = f" {intent['period'][2]}" if intent["period"] else ""
+            return f"Top {len(rows)} merchants by spend{in_category}{period}:\n" + "\n".join(lines)
+
+        if intent["intent"] == "monthly_totals":
+            rows = self.store.conn.execute(
+                f"SELECT substr(timestamp, 1, 7) AS month, SUM(-amount) FROM transactions WHERE {where}"
+                " GROUP BY month ORDER BY month",
+                params,
+            ).fetchall()
+            if not rows:
+                return f"No spending found{scope}."
+            lines, previous = [], None
+            for month, spent in rows:
+                change = f" ({(spent - previous) / previous:+.1%})" if previous else ""
+                lines.append(f"{month}: ₹{spent:,.2f}{change}")
+                previous = spent
+            return f"Monthly spend{scope}:\n" + "\n".join(lines)
+
+        spent, count = self.store.conn.execute(
+            f"SELECT COALESCE(SUM(-amount), 0), COUNT(*) FROM transactions WHERE {where}", params
+        ).fetchone()
+        return f"You spent ₹{spent:,.2f}{scope} ({count} transaction{'s' if count != 1 else ''})."
+
+
+def _find_names(text, names):
+    """
+    Names from the store that occur in `text` as whole words, longest first, without overlaps.
+
+    Returns:
+        tuple: (names found, [(start, end)] spans they occupy in `text`)
+    """
+    found, taken = [], []
+    for name in sorted(names, key=len, reverse=True):
+        for m in re.finditer(rf"(?<![\w]){re.escape(name.lower())}(?![\w])", text):
+            if not any(m.start() < end and start < m.end() for start, end in taken):
+                taken.append((m.start(), m.end()))
+                if name not in found:
+                    found.append(name)
+    return found, taken
+
+
+def _only_filler(text, entity_spans):
+    """True if nothing but FILLER is left once the entities and template words are removed from `text`."""
+    for start, end in sorted(entity_spans, reverse=True):
+        text = text[:start] + " " + text[end:]
+    for template in (SPEND, TOP_N, MONTHLY):
+        text = template.sub(" ", text)
+    return all(word in FILLER for word in re.findall(r"[\w']+", text))
+
+
+def _extract_period(text, today):
+    """
+    Pulls a supported time period out of `text`.
+
+    Returns:
+        tuple: ((start date, end date exclusive, label) or None, text without the period),
+            or (False, text) if the question mentions a period the router cannot express.
+    """
+    patterns = [
+        (r"\b(?:in |during )?this month\b", lambda m: _month(today.year, today.month)),
+        (r"\b(?:in |during )?last month\b",
+         lambda m: _month(today.year - (today.month == 1), 12 if today.month == 1 else today.month - 1)),
+        (r"\b(?:in |during )?this year\b", lambda m: _year(today.year)),
+        (r"\b(?:in |during )?last year\b", lambda m: _year(today.year - 1)),
+        (r"\b(?:in |over |during )?(?:the )?(?:last|past) (\d+) days\b",
+         lambda m: _last_days(int(m.group(1)), today)),
+        (r"\b(?:in |during )(" + "|".join(MONTHS) + r")\.?(?: (\d{4}))?\b",
+         lambda m: _named_month(MONTHS[m.group(1)], m.group(2), today)),
+        (r"\b(?:in |during )(\d{4})\b", lambda m: _year(int(m.group(1)))),
+    ]
+    for pattern, build in patterns:
+        m = re.search(pattern, text)
+        if m:
+            remainder = (text[:m.start()] + text[m.end():]).strip()
+            period = build(m)
+            if period is False or _mentions_period(remainder):
+                return False, text  # An empty range, or more than one period.
+            return period, remainder
+    if _mentions_period(text):
+        return False, text
+    return None, text
+
+
+def _mentions_period(text):
+    # "monthly" / "per month" ask for a breakdown, not a period.
+    return bool(OTHER_PERIOD.search(MONTHLY.sub(" ", text)))
+
+
+def _month(year, month):
+    start = date(year, month, 1)
+    end = date(year + (month == 12), 1 if month == 12 else month + 1, 1)
+    return start, end, f"in {calendar.month_name[month]} {year}"
+
+
+def _last_days(days, today):
+    if days < 1:
+        return False
+    return today - timedelta(days=days - 1), today + timedelta(days=1), f"in the last {days} days"
+
+
+def _named_month(month, year, today):
+    if year is None:
+        # Without a year, the most recent such month that has started.
+        year = today.year if month <= today.month else today.year - 1
+    return _month(int(year), month)
+
+
+def _year(year):
+    return date(year, 1, 1), date(year + 1, 1, 1), f"in {year}"
@@ -7,11 +7,23 @@ import uuid
 import re
 from datetime import datetime
 from collections import defaultdict
-import groq
-from vision_model import VisionModel
+from artifacts import JsonDirectoryWriter
 
 
 class RandomFinancialGenerator:
+    # (low, high) spend per category; anything else falls back to DEFAULT_AMOUNT_RANGE.
+    AMOUNT_RANGES = {
+        "Transport": (150, 1200), "Food": (350, 4500),
+        "Shopping": (1500, 15000), "Subscription": (199, 2500),
+        "Debt": (5000, 20000)
+    }
+    DEFAULT_AMOUNT_RANGE = (100, 1000)
+    # Category weights, in self.merchants order.
+    SCENARIO_WEIGHTS = {
+        "CRITICAL": [35, 35, 10, 10, 5, 5],
+        "STABLE": [10, 20, 30, 20, 10, 10],
+    }
+
     def __init__(self):
         self.merchants = {
             "Transport": ["Uber", "Ola", "Rapido", "BluSmart"],
@@ -23,12 +35,7 @@ class RandomFinancialGenerator:
         }
 
     def _random_amount(self, category):
-        ranges = {
-            "Transport": (150, 1200), "Food": (350, 4500),
-            "Shopping": (1500, 15000), "Subscription": (199, 2500),
-            "Debt": (5000, 20000)
-        }
-        low, high = ranges.get(category, (100, 1000))
+        low, high = self.AMOUNT_RANGES.get(category, self.DEFAULT_AMOUNT_RANGE)
         return round(random.uniform(low, high), 2)
 
     def generate_profile(self, user_id, scenario="CRITICAL"):
@@ -54,7 +61,7 @@ class RandomFinancialGenerator:
         history = []
         for _ in range(count):
             # Weigh categories based on scenario
-            weights = [35, 35, 10, 10, 5, 5] if scenario == "CRITICAL" else [10, 20, 30, 20, 10, 10]
+            weights = self.SCENARIO_WEIGHTS["CRITICAL" if scenario == "CRITICAL" else "STABLE"]
             cat = random.choices(list(self.merchants.keys()), weights=weights)[0]
             
             merchant = random.choice(self.merchants[cat])
@@ -92,9 +99,15 @@ class FinancialAnalyzer:
         print(f"[*] Analyzer: Crunching numbers for {profile['user_id']}...")
         
         # 1. Aggregate Data
-        total_inflow = self._clean_currency(profile['financial_status']['monthly_inflow'])
-        current_balance = self._clean_currency(profile['financial_status']['current_balance'])
-        
+        category_spend, total_outflow, subscriptions, high_risk_count, anomalies = self._aggregate(transactions)
+        return self._build_report(profile, category_spend, total_outflow, subscriptions, high_risk_count, anomalies)
+
+    def _aggregate(self, transactions):
+        """
+        Returns:
+            tuple: (category_spend defaultdict in first-seen order, total_outflow,
+                subscription items, number of high-risk transactions, first 3 of them).
+        """
         category_spend = defaultdict(float)
         total_outflow = 0
         subscriptions = []
@@ -112,6 +125,12 @@ class FinancialAnalyzer:
             if "SURGE_DETECTED" in txn['tags'] or "HIGH_VALUE" in txn['tags']:
                 high_risk_txns.append(txn)
 
+        return category_spend, total_outflow, subscriptions, len(high_risk_txns), high_risk_txns[:3]
+
+    def _build_report(self, profile, category_spend, total_outflow, subscriptions, high_risk_count, anomalies):
+        total_inflow = self._clean_currency(profile['financial_status']['monthly_inflow'])
+        current_balance = self._clean_currency(profile['financial_status']['current_balance'])
+
         # 2. Calculate Derived Metrics
         burn_rate_pct = (total_outflow / total_inflow) * 100 if total_inflow > 0 else 0
         
@@ -120,7 +139,7 @@ class FinancialAnalyzer:
         health_score = 100
         if burn_rate_pct > 80: health_score -= 30
         if current_balance < 5000: health_score -= 40
-        if len(high_risk_txns) > 3: health_score -= 10
+        if high_risk_count > 3: health_score -= 10
         health_score = max(0, health_score)
 
         # 4. Generate "Actionable Insights"
@@ -152,7 +171,7 @@ class FinancialAnalyzer:
                 "total_recurring_cost": f"₹{sum(s['cost'] for s in subscriptions):,.2f}",
                 "items": subscriptions
             },
-            "anomalies": high_risk_txns[:3], # Top 3 anomalies
+            "anomalies": anomalies, # Top 3 anomalies
             "strategic_advice": insights
         }
         
@@ -161,15 +180,43 @@ class FinancialAnalyzer:
 
 
 class FinancialPipeline:
-    def __init__(self, user_id):
+    def __init__(self, user_id, vision=None, generator=None, analyzer=None, writer=None):
+        """
+        Args:
+            user_id (str): User whose artifacts go to data/<user_id>.
+            vision (VisionModel, optional): Vision model to use. Built on first access, since
+                it needs GROQ_API_KEY and the analysis path never touches it.
+            generator (RandomFinancialGenerator, optional): Mock data source. Built on first use.
+            analyzer (FinancialAnalyzer, optional): Report builder. Built on first use.
+            writer (optional): Artifact writer from artifacts.py. Defaults to indented JSON
+                files under data/<user_id>.
+        """
         self.user_id = user_id
-        self.base_dir = os.path.join("data", user_id)
-        self.vision = VisionModel()
-        self.generator = RandomFinancialGenerator()
-        self.analyzer = FinancialAnalyzer() # <-- NEW ANALYZER ADDED
-        
-        if not os.path.exists(self.base_dir):
-            os.makedirs(self.base_dir)
+        self.writer = writer or JsonDirectoryWriter("data")
+        self.base_dir = self.writer.location(user_id)
+        self._vision = vision
+        self._generator = generator
+        self._analyzer = analyzer
+
+    @property
+    def vision(self):
+        if self._vision is None:
+            # Imported here so that groq/PyMuPDF are only loaded when vision is actually used.
+            from vision_model import VisionModel
+            self._vision = VisionModel()
+        return self._vision
+
+    @property
+    def generator(self):
+        if self._generator is None:
+            self._generator = RandomFinancialGenerator()
+        return self._generator
+
+    @property
+    def analyzer(self):
+        if self._analyzer is None:
+            self._analyzer = FinancialAnalyzer()
+        return self._analyzer
 
     def run_pipeline(self, scenario="CRITICAL"):
         print(f"\n--- 🚀 STARTING PIPELINE: {self.user_id} [{scenario}] ---")
@@ -190,8 +237,7 @@ class FinancialPipeline:
         return analysis_result
 
     def _save(self, data, filename):
-        with open(os.path.join(self.base_dir, filename), "w") as f:
-            json.dump(data, f, indent=2)
+        self.writer.write(self.user_id, filename, data)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+import json
+import math
+import re
+import time
+import zlib
+
+# Dimensions of the hashing vectorizer used when no embedding function is given.
+HASH_DIMENSIONS = 2048
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+
+
+def normalize_query(query):
+    """Lower-cases, drops punctuation and collapses whitespace, so trivially different phrasings share a key."""
+    return " ".join(_TOKEN.findall(query.lower()))
+
+
+def hashing_vector(text, dimensions=HASH_DIMENSIONS):
+    """
+    Sparse, L2-normalised bag of words and word bigrams, hashed into
+    `dimensions` buckets with CRC32 (stable across processes, unlike hash()).
+    """
+    words = text.split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector = {}
+    for feature in features:
+        bucket = zlib.crc32(feature.encode("utf-8")) % dimensions
+        vector[bucket] = vector.get(bucket, 0.0) + 1.0
+    return _normalized(vector)
+
+
+def cosine(a, b):
+    """Cosine similarity of two L2-normalised sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(index, 0.0) for index, value in a.items())
+
+
+def _normalized(vector):
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    if not norm:
+        return {}
+    return {index: value / norm for index, value in vector.items()}
+
+
+class QueryCache:
+    """
+    Caches FinancialAnalystTool answers in the transaction store's SQLite
+    file, keyed by the normalised question and the store's data version.
+    A sync that changes rows bumps the version, so older answers are never
+    served again and are purged on the next write.
+
+    With `semantic=True`, a miss on the exact key falls back to the most
+    similar cached question for the same data version, accepted only above
+    `similarity_threshold`. Questions that differ in a single merchant or
+    category name can still score highly, so keep the threshold strict.
+    """
+    def __init__(self, store, semantic=False, similarity_threshold=0.95, embed_fn=None, max_entries=1000):
+        """
+        Args:
+            store (TransactionStore): Store whose connection and data version the cache uses.
+            semantic (bool): Also match near-duplicate questions by vector similarity.
+            similarity_threshold (float): Minimum cosine similarity for a near-duplicate hit.
+            embed_fn (callable, optional): text -> list of floats from a local embedding model.
+                Defaults to a hashing vectorizer over words and bigrams.
+            max_entries (int): Upper bound on cached answers; oldest are dropped first.
+        """
+        self.store = store
+        self.conn = store.conn
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn
+        self.max_entries = max_entries
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+        self._vectors = None  # (data_version, [(normalized, vector)]) loaded lazily for semantic lookups.
+
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS _query_cache ("
+            " normalized TEXT NOT NULL, data_version INTEGER NOT NULL, answer TEXT NOT NULL,"
+            " vector TEXT, elapsed REAL NOT NULL, created_at REAL NOT NULL,"
+            " PRIMARY KEY (normalized, data_version))"
+        )
+        self.conn.commit()
+
+    def _embed(self, normalized):
+        if self.embed_fn is None:
+            return hashing_vector(normalized)
+        return _normalized({index: float(value) for index, value in enumerate(self.embed_fn(normalized)) if value})
+
+    def get(self, query):
+        """Returns the cached answer for `query` under the current data version, or None."""
+        normalized = normalize_query(query)
+        version = self.store.data_version
+        row = self.conn.execute(
+            "SELECT answer, elapsed FROM _query_cache WHERE normalized = ? AND data_version = ?",
+            (normalized, version),
+        ).fetchone()
+
+        if row is None and self.semantic:
+            match = self._nearest(normalized, version)
+            if match is not None:
+                row = self.conn.execute(
+                    "SELECT answer, elapsed FROM _query_cache WHERE normalized = ? AND data_version = ?",
+                    (match, version),
+                ).fetchone()
+                if row is not None:
+                    self.semantic_hits += 1
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.seconds_saved += row[1]
+        return row[0]
+
+    def _nearest(self, normalized, version):
+        if self._vectors is None or self._vectors[0] != version:
+            entries = []
+            for key, vector in self.conn.execute(
+                "SELECT normalized, vector FROM _query_cache WHERE data_version = ? AND vector IS NOT NULL", (version,)
+            ):
+                entries.append((key, {int(index): value for index, value in json.loads(vector).items()}))
+            self._vectors = (version, entries)
+
+        query_vector = self._embed(normalized)
+        best, best_score = None, self.similarity_threshold
+        for key, vector in self._vectors[1]:
+            score = cosine(query_vector, vector)
+            if score >= best_score:
+                best, best_score = key, score
+        return best
+
+    def set(self, query, answer, elapsed):
+        """Stores an answer that took `elapsed` seconds to compute."""
+        normalized = normalize_query(query)
+        version = self.store.data_version
+        vector = self._embed(normalized) if self.semantic else None
+        self.conn.execute(
+            "INSERT OR REPLACE INTO _query_cache (normalized, data_version, answer, vector, elapsed, created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (normalized, version, answer, json.dumps(vector) if vector else None, elapsed, time.time()),
+        )
+        self.conn.execute("DELETE FROM _query_cache WHERE data_version != ?", (version,))
+        self.conn.execute(
+            "DELETE FROM _query_cache WHERE rowid IN ("
+            " SELECT rowid FROM _query_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self.conn.commit()
+        if vector and self._vectors is not None and self._vectors[0] == version:
+            self._vectors[1].append((normalized, vector))
+
+    def clear(self):
+        self.conn.execute("DELETE FROM _query_cache")
+        self.conn.commit()
+        self._vectors = None
+        self.hits = self.semantic_hits = self.misses = 0
+        self.seconds_saved = 0.0
+
+    def stats(self):
+        entries = self.conn.execute(
+            "SELECT COUNT(*) FROM _query_cache WHERE data_version = ?", (self.store.data_version,)
+        ).fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "seconds_saved": round(self.seconds_saved, 3),
+            "entries": entries,
+            "data_version": self.store.data_version,
+        }
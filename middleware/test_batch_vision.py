@@ -0,0 +1,71 @@
+import base64
+import io
+import json
+from types import SimpleNamespace
+
+from PIL import Image
+
+from batch_vision import process_directory
+from vision_model import VisionModel
+
+
+class StubCompletions:
+    def __init__(self, reply=None, error=None):
+        self.reply = reply
+        self.error = error
+
+    def create(self, **kwargs):
+        if self.error:
+            raise self.error
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.reply))])
+
+
+def make_vision(completions):
+    vision = VisionModel(api_key="test", cache=False, max_retries=0)
+    vision.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return vision
+
+
+def read_manifest(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_api_errors_are_recorded_as_failures_and_retried(tmp_path):
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    for name in ("a.png", "b.png"):
+        Image.new("RGB", (64, 64), "white").save(input_dir / name)
+
+    rejected = make_vision(StubCompletions(error=Exception("Error code: 401 - invalid api key")))
+    summary = process_directory(str(input_dir), str(output_dir), workers=2, vision=rejected)
+    assert summary["failed"] == 2
+    entries = read_manifest(output_dir / "manifest.jsonl")
+    assert {entry["status"] for entry in entries} == {"error"}
+    assert all("401" in entry["error"] for entry in entries)
+
+    accepted = make_vision(StubCompletions(reply="Total: 42"))
+    summary = process_directory(str(input_dir), str(output_dir), workers=2, vision=accepted)
+    assert summary["processed"] == 2 and summary["failed"] == 0 and summary["skipped"] == 0
+
+    with open(output_dir / "a.png.json") as f:
+        results = json.load(f)
+    assert results["failed_pages"] == 0
+    assert results["analysis"][0]["content"] == "Total: 42"
+
+    summary = process_directory(str(input_dir), str(output_dir), workers=2, vision=accepted)
+    assert summary["processed"] == 0 and summary["skipped"] == 2
+
+
+def test_image_preprocessing_follows_grayscale_setting(tmp_path):
+    path = tmp_path / "photo.png"
+    Image.effect_noise((400, 300), 64).convert("RGB").save(path)
+    completions = StubCompletions(reply="ok")
+    for grayscale, mode in ((False, "RGB"), (True, "L")):
+        vision = make_vision(completions)
+        vision.grayscale = grayscale
+        sent = []
+        vision.analyze_image = lambda img_b64, **kwargs: sent.append(img_b64) or "ok"
+        vision.process_file(str(path), str(tmp_path / "out.json"))
+        with Image.open(io.BytesIO(base64.b64decode(sent[0]))) as img:
+            assert img.mode == mode
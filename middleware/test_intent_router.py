@@ -0,0 +1,74 @@
+import json
+from datetime import date
+
+import pytest
+
+from intent_router import IntentRouter
+from transaction_store import TransactionStore
+
+TODAY = date(2025, 6, 15)
+TRANSACTIONS = [
+    {"id": "t1", "timestamp": "2025-03-05T10:00:00", "merchant": "Uber", "amount": -100.0, "category": "Transport", "tags": []},
+    {"id": "t2", "timestamp": "2025-04-07T10:00:00", "merchant": "Uber", "amount": -200.0, "category": "Transport", "tags": []},
+    {"id": "t3", "timestamp": "2025-05-20T10:00:00", "merchant": "Uber", "amount": -400.0, "category": "Transport", "tags": []},
+    {"id": "t4", "timestamp": "2025-05-21T10:00:00", "merchant": "Swiggy", "amount": -50.0, "category": "Food", "tags": []},
+]
+
+
+@pytest.fixture
+def router(tmp_path):
+    source = tmp_path / "transactions.json"
+    source.write_text(json.dumps(TRANSACTIONS))
+    store = TransactionStore(str(tmp_path / "store.db"))
+    store.sync(str(source))
+    yield IntentRouter(store)
+    store.close()
+
+
+@pytest.mark.parametrize("query", [
+    "How much did I spend on Uber for March?",
+    "How much did I spend on Uber in sept?",
+    "How much did I spend on Uber over the summer?",
+    "How much did I spend on Uber in winter?",
+    "How much did I spend on Uber in March and April?",
+    "How much did I spend on Uber in March and last month?",
+    "How much did I spend on Uber last month and the month before?",
+    "How much did I spend on Uber this month and for the last one?",
+    "Monthly spend on Uber over the last 2 years",
+    "How much did I spend on Uber recently?",
+    "How much did I spend on Uber lately?",
+    "How much did I spend on Uber this morning?",
+    "How much did I spend on Uber on Saturday?",
+    "How much did I spend on Uber on the 14th?",
+    "How much did I spend on Uber in H1?",
+    "How much did I spend on my last ride on Uber?",
+    "How much did I spend on Uber in the last 0 days?",
+    "Top 0 merchants last month",
+])
+def test_unrecognised_periods_fall_back_to_agent(router, query):
+    assert router.match(query, today=TODAY) is None
+    assert router.answer(query, today=TODAY) is None
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("How much did I spend on Uber in March?", "You spent ₹100.00 on Uber in March 2025 (1 transaction)."),
+    ("How much did I spend on Uber in apr 2025?", "You spent ₹200.00 on Uber in April 2025 (1 transaction)."),
+    ("How much did I spend on Uber last month?", "You spent ₹400.00 on Uber in May 2025 (1 transaction)."),
+    ("How much did I spend on Uber?", "You spent ₹700.00 on Uber (3 transactions)."),
+    ("How much did I spend on Food this year?", "You spent ₹50.00 on Food in 2025 (1 transaction)."),
+    ("What is my total spend on Food this year?", "You spent ₹50.00 on Food in 2025 (1 transaction)."),
+    ("How much have I spent on Uber in the last 30 days?", "You spent ₹400.00 on Uber in the last 30 days (1 transaction)."),
+])
+def test_supported_periods(router, query, expected):
+    assert router.answer(query, today=TODAY) == expected
+
+
+def test_monthly_breakdown_is_not_a_period(router):
+    answer = router.answer("Monthly spend on Uber", today=TODAY)
+    assert answer.splitlines()[0] == "Monthly spend on Uber:"
+    assert len(answer.splitlines()) == 4
+
+
+def test_top_merchants_with_filler(router):
+    answer = router.answer("Show me my top 2 merchants this year", today=TODAY)
+    assert answer.splitlines() == ["Top 2 merchants by spend in 2025:", "1. Uber: ₹700.00", "2. Swiggy: ₹50.00"]
@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from stats import percentile
+
+DEFAULT_TRACE_PATH = os.environ.get(
+    "AGENT_TRACE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "agent_traces.jsonl"),
+)
+# Tool names used by LangChain's SQL toolkit; the rest are recorded under their own name.
+SQL_TOOLS = {"sql_db_query": "sql", "sql_db_schema": "sql_schema", "sql_db_list_tables": "sql_tables",
+             "sql_db_query_checker": "sql_checker"}
+
+
+class AgentTracer(BaseCallbackHandler):
+    """
+    LangChain callback handler that times every step of one
+    FinancialAnalystTool.run call and appends the trace as one JSON line
+    to `path`. Steps are typed as "llm" (with token counts), "sql" (with
+    the query text), other SQL toolkit tools, "parse_error" for retries
+    after unparseable LLM output, and "fast_path"/"cache" for answers that
+    skipped the agent.
+    """
+    def __init__(self, path=DEFAULT_TRACE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._trace = None
+        self._open = {}  # run_id -> (started, step)
+
+    def begin(self, query):
+        self._trace = {
+            "trace_id": uuid.uuid4().hex,
+            "query": query,
+            "started_at": time.time(),
+            "steps": [],
+        }
+        self._started = time.perf_counter()
+        self._open = {}
+
+    def add_step(self, step_type, seconds, **fields):
+        if self._trace is not None:
+            with self._lock:
+                self._trace["steps"].append({"type": step_type, "seconds": round(seconds, 6), **fields})
+
+    def end(self, error=None):
+        """Finishes the current trace and appends it to the trace file."""
+        if self._trace is None:
+            return None
+        trace, self._trace = self._trace, None
+        trace["total_seconds"] = round(time.perf_counter() - self._started, 6)
+        trace["status"] = "failed" if error else "ok"
+        if error:
+            trace["error"] = str(error)
+        trace["llm_calls"] = sum(1 for step in trace["steps"] if step["type"] == "llm")
+        trace["total_tokens"] = sum(step.get("total_tokens") or 0 for step in trace["steps"])
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(trace) + "\n")
+        return trace
+
+    def _start(self, run_id, step):
+        with self._lock:
+            self._open[run_id] = (time.perf_counter(), step)
+
+    def _finish(self, run_id, **fields):
+        with self._lock:
+            started, step = self._open.pop(run_id, (None, None))
+        if step is not None:
+            step.update(fields)
+            self.add_step(step.pop("type"), time.perf_counter() - started, **step)
+
+    # LLM calls. ChatGroq reports through on_chat_model_start; plain LLMs through on_llm_start.
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, {"type": "llm"})
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, {"type": "llm"})
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if not usage and response.generations and response.generations[0]:
+            metadata = getattr(getattr(response.generations[0][0], "message", None), "usage_metadata", None) or {}
+            usage = {
+                "prompt_tokens": metadata.get("input_tokens"),
+                "completion_tokens": metadata.get("output_tokens"),
+                "total_tokens": metadata.get("total_tokens"),
+            }
+        self._finish(
+            run_id,
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            total_tokens=usage.get("total_tokens"),
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=str(error))
+
+    # Tool calls, including the SQL query itself.
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        step = {"type": SQL_TOOLS.get(name, name), "tool": name}
+        if name == "_Exception":
+            step["type"] = "parse_error"
+        elif name in ("sql_db_query", "sql_db_query_checker"):
+            step["sql"] = input_str
+        self._start(run_id, step)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=str(error))
+
+
+def summarize(path=DEFAULT_TRACE_PATH):
+    """
+    Aggregates a trace file into per-step-type latency figures.
+
+    Returns:
+        dict: step type -> {"count", "p50_seconds", "p95_seconds", "total_seconds"},
+            plus a "run" entry for whole run() calls.
+    """
+    durations = defaultdict(list)
+    tokens = defaultdict(int)
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                trace = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            durations["run"].append(trace["total_seconds"])
+            for step in trace["steps"]:
+                durations[step["type"]].append(step["seconds"])
+                tokens[step["type"]] += step.get("total_tokens") or 0
+
+    summary = {}
+    for step_type, values in sorted(durations.items()):
+        summary[step_type] = {
+            "count": len(values),
+            "p50_seconds": percentile(values, 50),
+            "p95_seconds": percentile(values, 95),
+            "total_seconds": round(sum(values), 6),
+        }
+        if tokens[step_type]:
+            summary[step_type]["total_tokens"] = tokens[step_type]
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise FinancialAnalystTool traces (p50/p95 per step type).")
+    parser.add_argument("path", nargs="?", default=DEFAULT_TRACE_PATH)
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+    args = parser.parse_args()
+
+    summary = summarize(args.path)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"{'step':<14}{'count':>8}{'p50 s':>10}{'p95 s':>10}{'total s':>10}{'tokens':>10}")
+        for step_type, row in summary.items():
+            print(f"{step_type:<14}{row['count']:>8}{row['p50_seconds']:>10.3f}{row['p95_seconds']:>10.3f}"
+                  f"{row['total_seconds']:>10.2f}{row.get('total_tokens', ''):>10}")
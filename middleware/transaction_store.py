@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+# Columns every store has; any other keys found in the source are added as extra columns.
+BASE_COLUMNS = {
+    "id": "TEXT PRIMARY KEY",
+    "timestamp": "TEXT",
+    "merchant": "TEXT",
+    "amount": "REAL",
+    "category": "TEXT",
+    "tags": "TEXT",
+}
+INDEXED_COLUMNS = ("merchant", "category", "timestamp")
+# Rows compared per round-trip; stays under SQLite's default 999 bound-parameter limit.
+CHUNK_SIZE = 900
+
+
+class TransactionStore:
+    """
+    On-disk SQLite copy of a transactions JSON file, reused across runs.
+
+    `sync()` is a no-op when the source file's mtime and size are unchanged,
+    so opening an existing store costs the same regardless of history size.
+    When the file has changed, rows are compared by id and content hash and
+    only new or changed rows are written. Rows removed from the source are
+    kept; delete the store file to rebuild from scratch.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self._create_schema()
+        self.columns = [row[1] for row in self.conn.execute("PRAGMA table_info(transactions)")]
+
+    @property
+    def uri(self):
+        return f"sqlite:///{os.path.abspath(self.db_path)}"
+
+    def _create_schema(self):
+        columns = ", ".join(f'"{name}" {kind}' for name, kind in BASE_COLUMNS.items())
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS transactions ({columns})")
+        for column in INDEXED_COLUMNS:
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS idx_transactions_{column} ON transactions ("{column}")')
+        # Bookkeeping lives in underscore tables that are not exposed to the SQL agent.
+        self.conn.execute("CREATE TABLE IF NOT EXISTS _row_state (id TEXT PRIMARY KEY, row_hash TEXT NOT NULL)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS _sources ("
+            " path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, synced_at REAL)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS _meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+
+    @property
+    def data_version(self):
+        """Counter bumped every time a sync changes rows; used to invalidate derived caches."""
+        row = self.conn.execute("SELECT value FROM _meta WHERE key = 'data_version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def sync(self, json_path):
+        """
+        Brings the store up to date with `json_path`.
+
+        Returns:
+            int: Number of rows inserted or updated (0 if the file was unchanged).
+        """
+        path = os.path.abspath(json_path)
+        stat = os.stat(path)
+        known = self.conn.execute("SELECT mtime_ns, size FROM _sources WHERE path = ?", (path,)).fetchone()
+        if known == (stat.st_mtime_ns, stat.st_size):
+            return 0
+
+        changed = 0
+        chunk = []
+        for record in _iter_records(path):
+            chunk.append(record)
+            if len(chunk) >= CHUNK_SIZE:
+                changed += self._upsert_changed(chunk)
+                chunk = []
+        if chunk:
+            changed += self._upsert_changed(chunk)
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO _sources (path, mtime_ns, size, synced_at) VALUES (?, ?, ?, ?)",
+            (path, stat.st_mtime_ns, stat.st_size, time.time()),
+        )
+        if changed:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO _meta (key, value) VALUES ('data_version', ?)",
+                (str(self.data_version + 1),),
+            )
+        self.conn.commit()
+        return changed
+
+    def _upsert_changed(self, records):
+        rows = {}
+        for record in records:
+            row = _flatten(record)
+            row_hash = hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+            row["id"] = str(row.get("id") or row_hash)
+            rows[row["id"]] = (row, row_hash)
+
+        ids = list(rows)
+        placeholders = ", ".join("?" * len(ids))
+        known = dict(self.conn.execute(f"SELECT id, row_hash FROM _row_state WHERE id IN ({placeholders})", ids))
+        changed = [(row, row_hash) for row_id, (row, row_hash) in rows.items() if known.get(row_id) != row_hash]
+        if not changed:
+            return 0
+
+        self._ensure_columns(row for row, _ in changed)
+        columns = ", ".join(f'"{name}"' for name in self.columns)
+        values = ", ".join("?" * len(self.columns))
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO transactions ({columns}) VALUES ({values})",
+            [tuple(row.get(name) for name in self.columns) for row, _ in changed],
+        )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO _row_state (id, row_hash) VALUES (?, ?)",
+            [(row["id"], row_hash) for row, row_hash in changed],
+        )
+        return len(changed)
+
+    def _ensure_columns(self, rows):
+        for row in rows:
+            for name, value in row.items():
+                if name not in self.columns:
+                    kind = "REAL" if isinstance(value, (int, float)) and not isinstance(value, bool) else "TEXT"
+                    self.conn.execute(f'ALTER TABLE transactions ADD COLUMN "{name}" {kind}')
+                    self.columns.append(name)
+
+    def close(self):
+        self.conn.close()
+
+
+def _flatten(record):
+    """Makes a record SQL-friendly: list columns (like 'tags') become comma-joined strings."""
+    row = {}
+    for key, value in record.items():
+        if isinstance(value, list):
+            value = ", ".join(str(v) for v in value)
+        elif isinstance(value, dict):
+            value = json.dumps(value)
+        row[key] = value
+    return row
+
+
+def _iter_records(json_path):
+    """
+    Lazily yields transaction records from `json_path` without loading the
+    whole file. Accepts a bare list, an object with a "transactions" list
+    (other keys are skipped), a single object, or JSON Lines.
+    """
+    with open(json_path, "r") as f:
+        stream = _JSONStream(f)
+        first = stream.peek()
+        if first == "[":
+            yield from stream.iter_array()
+        elif first == "{":
+            yield from _iter_object_or_lines(stream)
+        elif first:
+            raise ValueError(f"Unexpected character {first!r} at the start of {json_path}")
+
+
+def _iter_object_or_lines(stream):
+    stream.expect("{")
+    record = {}
+    found = False
+    if stream.peek() == "}":
+        stream.advance()
+    else:
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key == "transactions" and stream.peek() == "[":
+                yield from stream.iter_array()
+                found = True
+            else:
+                record[key] = stream.value()
+            separator = stream.advance()
+            if separator == "}":
+                break
+            if separator != ",":
+                raise ValueError(f"Expected ',' or '}}' but found {separator!r}")
+
+    if found:
+        return
+
+    # No "transactions" key: the object is itself a record, either the whole
+    # file or the first line of a JSON Lines file.
+    yield record
+    while stream.peek() == "{":
+        yield stream.value()
+
+
+class _JSONStream:
+    """Minimal pull parser over a text file that decodes one JSON value at a time."""
+    WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self, f, chunk_size=1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            self.pos = self.WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def advance(self):
+        char = self.peek()
+        self.pos += 1
+        return char
+
+    def expect(self, char):
+        found = self.advance()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r}")
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # The value continues past the buffered text.
+                if not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk.
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def iter_array(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self.advance()
+            return
+        while True:
+            yield self.value()
+            separator = self.advance()
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or ']' but found {separator!r}")
@@ -1,24 +1,115 @@
 import os
 import json
 import base64
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import groq
 import fitz  # PyMuPDF
+from image_preprocessing import preprocess_image
+from response_cache import ResponseCache
+
+# MIME types for the image files process_file accepts directly.
+IMAGE_MIME_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".bmp": "image/bmp",
+    ".gif": "image/gif",
+}
+
+
+_shared_clients = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_shared_client(api_key, base_url=None):
+    """
+    Returns the process-wide Groq client for `api_key`/`base_url`, creating it
+    on first use. Keyed by pid as well, so a forked worker never reuses the
+    parent's connection pool.
+    """
+    key = (os.getpid(), api_key, base_url)
+    with _shared_clients_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            # Retries are handled in analyze_image so they go through the rate limiter.
+            client = _shared_clients[key] = groq.Groq(api_key=api_key, base_url=base_url, max_retries=0)
+        return client
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: allows `rate` requests per second on average,
+    with bursts of up to `capacity` requests.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available, then consumes it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class VisionAnalysisError(Exception):
+    """Raised by analyze_image(raise_errors=True) when the API call fails after retries."""
+
 
 class VisionModel:
-    def __init__(self, api_key=None, model_name="llama-3.2-11b-vision-preview"):
+    def __init__(self, api_key=None, model_name="llama-3.2-11b-vision-preview", base_url=None,
+                 max_concurrency=4, requests_per_second=None, max_retries=3,
+                 dpi=72, grayscale=False, jpeg_quality=85, preprocess_images=True, max_long_edge=1600,
+                 cache=True):
         """
         Initialize the VisionModel with Groq client.
         
         Args:
             api_key (str, optional): Groq API key. If None, it attempts to fetch from environment variable GROQ_API_KEY.
             model_name (str): Name of the vision model to use.
+            base_url (str, optional): Override for the API endpoint, e.g. a local chat-completions stub.
+            max_concurrency (int): Maximum number of PDF pages analyzed at the same time.
+            requests_per_second (float, optional): Client-side rate limit shared by all pages. None disables it.
+            max_retries (int): Retries for rate-limited (429), 5xx and connection errors, with exponential backoff.
+            dpi (int): Resolution PDF pages are rendered at.
+            grayscale (bool): Render PDF pages and preprocessed image files in grayscale.
+            jpeg_quality (int): JPEG quality (1-100) for rendered PDF pages and preprocessed images.
+            preprocess_images (bool): Downscale and crop image files before upload.
+            max_long_edge (int): Longest side in pixels for preprocessed images.
+            cache (bool | ResponseCache): Reuse responses for identical image/prompt/model. True uses
+                the default on-disk cache (VISION_CACHE_PATH), False disables caching.
         """
         self.api_key = api_key or os.environ.get("GROQ_API_KEY")
         if not self.api_key:
             raise ValueError("Groq API key is required. Set GROQ_API_KEY environment variable or pass it to __init__.")
         
-        self.client = groq.Groq(api_key=self.api_key)
+        self.client = get_shared_client(self.api_key, base_url)
         self.model_name = model_name
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_limiter = TokenBucket(requests_per_second) if requests_per_second else None
+        self.max_retries = max_retries
+        self.dpi = dpi
+        self.grayscale = grayscale
+        self.jpeg_quality = jpeg_quality
+        self.preprocess_images = preprocess_images
+        self.max_long_edge = max_long_edge
+        if cache is True:
+            cache = ResponseCache()
+        self.cache = cache or None
 
     def encode_image(self, image_path):
         """
@@ -33,10 +124,36 @@ class VisionModel:
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode('utf-8')
 
+    def iter_pdf_images(self, pdf_path, dpi=None, grayscale=None, jpeg_quality=None):
+        """
+        Renders PDF pages one at a time and yields each as a base64 encoded JPEG,
+        so only the page currently being handled is held in memory.
+        
+        Args:
+            pdf_path (str): Path to the PDF file.
+            dpi (int, optional): Render resolution. Defaults to the instance setting.
+            grayscale (bool, optional): Render in grayscale. Defaults to the instance setting.
+            jpeg_quality (int, optional): JPEG quality. Defaults to the instance setting.
+            
+        Yields:
+            str: Base64 encoded JPEG of each page, in page order.
+        """
+        dpi = dpi or self.dpi
+        grayscale = self.grayscale if grayscale is None else grayscale
+        jpeg_quality = jpeg_quality or self.jpeg_quality
+        colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+
+        with fitz.open(pdf_path) as doc:
+            for page in doc:
+                pix = page.get_pixmap(dpi=dpi, colorspace=colorspace)
+                image_bytes = pix.tobytes("jpeg", jpg_quality=jpeg_quality)
+                del pix
+                yield base64.b64encode(image_bytes).decode('utf-8')
+
     def pdf_to_images(self, pdf_path):
         """
-        Converts PDF pages to temporary image files and encodes them.
-        For simplicity in this version, we will return a list of base64 encoded strings, one for each page.
+        Converts every PDF page to a base64 encoded JPEG.
+        Prefer iter_pdf_images for large files; this keeps all pages in memory.
         
         Args:
             pdf_path (str): Path to the PDF file.
@@ -44,54 +161,82 @@ class VisionModel:
         Returns:
             list: List of base64 encoded strings.
         """
-        doc = fitz.open(pdf_path)
-        encoded_images = []
-        
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            pix = page.get_pixmap()
-            # We can convert pixmap to bytes directly
-            image_bytes = pix.tobytes("png")
-            encoded_string = base64.b64encode(image_bytes).decode('utf-8')
-            encoded_images.append(encoded_string)
-            
-        doc.close()
-        return encoded_images
+        return list(self.iter_pdf_images(pdf_path))
 
-    def analyze_image(self, base64_image, prompt="Describe this image in detail."):
+    def analyze_image(self, base64_image, prompt="Describe this image in detail.", mime_type="image/jpeg", use_cache=True,
+                      raise_errors=False):
         """
         Sends the image to Groq API for analysis.
         
         Args:
             base64_image (str): Base64 encoded image string.
             prompt (str): Prompt for the model.
+            mime_type (str): MIME type of the encoded image.
+            use_cache (bool): Set False to bypass the response cache for this call.
+            raise_errors (bool): Raise VisionAnalysisError on failure instead of returning an error string.
             
         Returns:
             str: Model response/analysis.
         """
-        try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}",
+        cache_key = None
+        if self.cache and use_cache:
+            cache_key = ResponseCache.make_key(base64_image, prompt, self.model_name)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        attempt = 0
+        while True:
+            try:
+                if self.rate_limiter:
+                    self.rate_limiter.acquire()
+                chat_completion = self.client.chat.completions.create(
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": [
+                                {"type": "text", "text": prompt},
+                                {
+                                    "type": "image_url",
+                                    "image_url": {
+                                        "url": f"data:{mime_type};base64,{base64_image}",
+                                    },
                                 },
-                            },
-                        ],
-                    }
-                ],
-                model=self.model_name,
-            )
-            return chat_completion.choices[0].message.content
-        except Exception as e:
-            return f"Error processing image: {str(e)}"
-
-    def process_file(self, file_path, output_json_path, prompt="Analyze the content of this document/image."):
+                            ],
+                        }
+                    ],
+                    model=self.model_name,
+                )
+                content = chat_completion.choices[0].message.content
+                if cache_key:
+                    self.cache.set(cache_key, content)
+                return content
+            except Exception as e:
+                if attempt < self.max_retries and self._is_retryable(e):
+                    time.sleep(self._backoff_delay(e, attempt))
+                    attempt += 1
+                    continue
+                if raise_errors:
+                    raise VisionAnalysisError(str(e)) from e
+                return f"Error processing image: {str(e)}"
+
+    @staticmethod
+    def _is_retryable(error):
+        if isinstance(error, (groq.APIConnectionError, groq.RateLimitError)):
+            return True
+        return isinstance(error, groq.APIStatusError) and error.status_code >= 500
+
+    @staticmethod
+    def _backoff_delay(error, attempt):
+        """Honours a Retry-After header when present, else exponential backoff with jitter."""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            return min(float(retry_after), 60.0)
+        except (TypeError, ValueError):
+            return min(0.5 * (2 ** attempt), 30.0) * random.uniform(0.5, 1.0)
+
+    def process_file(self, file_path, output_json_path, prompt="Analyze the content of this document/image.", concurrency=None):
         """
         Processes a file (Image or PDF), runs vision analysis, and saves results to a JSON file.
         
@@ -99,6 +244,11 @@ class VisionModel:
             file_path (str): Path to the input file.
             output_json_path (str): Path to save the output JSON.
             prompt (str): Analysis prompt.
+            concurrency (int, optional): Pages analyzed in parallel. Defaults to max_concurrency; 1 is sequential.
+            
+        Returns:
+            dict: The saved results, or None for an unsupported file type. Pages whose analysis
+                failed carry an "error" key and are counted in "failed_pages".
         """
         file_ext = os.path.splitext(file_path)[1].lower()
         results = {
@@ -110,29 +260,55 @@ class VisionModel:
         if file_ext in ['.pdf']:
             results["type"] = "pdf"
             print(f"Processing PDF: {file_path}...")
-            encoded_images = self.pdf_to_images(file_path)
-            for i, img_b64 in enumerate(encoded_images):
-                print(f"Analyzing page {i+1}/{len(encoded_images)}...")
-                page_analysis = self.analyze_image(img_b64, prompt=f"Page {i+1}: {prompt}")
-                results["analysis"].append({
-                    "page": i + 1,
-                    "content": page_analysis
-                })
+            with fitz.open(file_path) as doc:
+                page_count = len(doc)
+
+            def analyze_page(i, img_b64):
+                print(f"Analyzing page {i+1}/{page_count}...")
+                return self._analyze_page({"page": i + 1}, img_b64, prompt=f"Page {i+1}: {prompt}")
+
+            def collect(i, future):
+                results["analysis"].append(future.result())
+
+            # Pages are rendered while earlier ones are being analyzed. At most
+            # `workers` rendered pages are in flight, and they are collected in
+            # submission order so results stay in page order.
+            workers = max(1, concurrency or self.max_concurrency)
+            in_flight = deque()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for i, img_b64 in enumerate(self.iter_pdf_images(file_path)):
+                    if len(in_flight) >= workers:
+                        collect(*in_flight.popleft())
+                    in_flight.append((i, pool.submit(analyze_page, i, img_b64)))
+                while in_flight:
+                    collect(*in_flight.popleft())
         
-        elif file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.gif']:
+        elif file_ext in IMAGE_MIME_TYPES:
             results["type"] = "image"
             print(f"Processing Image: {file_path}...")
-            img_b64 = self.encode_image(file_path)
-            analysis = self.analyze_image(img_b64, prompt=prompt)
-            results["analysis"].append({
-                "page": 1,
-                "content": analysis
-            })
+            page = {"page": 1}
+            mime_type = IMAGE_MIME_TYPES[file_ext]
+            if self.preprocess_images:
+                img_b64, mime_type, stats = preprocess_image(
+                    file_path,
+                    max_long_edge=self.max_long_edge,
+                    grayscale=self.grayscale,
+                    jpeg_quality=self.jpeg_quality,
+                    original_mime_type=mime_type,
+                )
+                print(f"Preprocessed: {stats['original_bytes']:,} -> {stats['final_bytes']:,} bytes "
+                      f"({stats['bytes_saved']:,} saved)")
+                page["preprocessing"] = stats
+            else:
+                img_b64 = self.encode_image(file_path)
+            results["analysis"].append(self._analyze_page(page, img_b64, prompt=prompt, mime_type=mime_type))
         
         else:
             print(f"Unsupported file type: {file_ext}")
             return
 
+        results["failed_pages"] = sum(1 for page in results["analysis"] if "error" in page)
+
         # Ensure directory exists
         os.makedirs(os.path.dirname(output_json_path), exist_ok=True)
         
@@ -140,6 +316,16 @@ class VisionModel:
             json.dump(results, f, indent=4)
         
         print(f"Results saved to {output_json_path}")
+        return results
+
+    def _analyze_page(self, page, img_b64, prompt, mime_type="image/jpeg"):
+        """Fills in page["content"], or page["error"] (with the usual error text as content) on failure."""
+        try:
+            page["content"] = self.analyze_image(img_b64, prompt=prompt, mime_type=mime_type, raise_errors=True)
+        except VisionAnalysisError as e:
+            page["content"] = f"Error processing image: {str(e)}"
+            page["error"] = str(e)
+        return page
 
 if __name__ == "__main__":
     # Example Usage (Commented out)